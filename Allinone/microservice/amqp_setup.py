@@ -1,27 +1,176 @@
 import pika
+from pika.exceptions import AMQPError, AMQPConnectionError, AMQPChannelError
+import copy
 import json
+import threading
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+REVOKE_QUEUE = 'revoke_queue'
+NOTIFICATION_QUEUE = 'notification_queue'
+
+# reconnect attempts per publish before giving up, a dropped connection is normally fixed by the first one
+PUBLISH_ATTEMPTS = 3
+# messages published per transaction, the broker is waited on once per chunk instead of once per message
+PUBLISH_CHUNK_SIZE = 100
+
+class PublishError(AMQPError):
+    """A batch publish that gave up part way, published is how many messages the broker committed first."""
+
+    def __init__(self, published, cause):
+        super().__init__(published, cause)
+        self.published = published
+        self.cause = cause
+
+    def __str__(self):
+        return f"published {self.published} messages before failing: {self.cause}"
+
+
 def get_amqp_connection():
     return pika.BlockingConnection(pika.ConnectionParameters(os.getenv('RABBITMQ_HOST')))
 
-def publish_to_queue(data):
-    connection = get_amqp_connection()
-    channel = connection.channel()
-    
-    # Declare the queue
-    channel.queue_declare(queue='revoke_queue', durable=True)
-    
-    # Publish the message to the queue
-    channel.basic_publish(
-        exchange='',
-        routing_key='revoke_queue',
-        body=json.dumps(data),
-        properties=pika.BasicProperties(
+
+class Publisher:
+    """
+    Long-lived, thread-safe publisher.
+    Keeps one connection and transactional channel per process, declares each queue once
+    and reconnects when the broker drops the connection.
+    BlockingChannel in confirm mode waits for every basic_publish, so batches are published
+    in transactions instead: a chunk of messages goes out back to back and tx_commit waits for
+    the broker once, returning after it has stored them all.
+    """
+
+    def __init__(self, connect=get_amqp_connection):
+        self.connect = connect
+        self.connection = None
+        self.channel = None
+        self.declared_queues = set()
+        self.lock = threading.Lock()
+
+    def get_channel(self):
+        if self.channel is None or self.channel.is_closed or self.connection.is_closed:
+            self.reset()
+            self.connection = self.connect()
+            self.channel = self.connection.channel()
+            # messages are only handed to the queues when tx_commit returns
+            self.channel.tx_select()
+        else:
+            # services heartbeats on an idle connection, raises if the broker has gone away
+            self.connection.process_data_events(time_limit=0)
+        return self.channel
+
+    def reset(self):
+        connection = self.connection
+        self.connection = None
+        self.channel = None
+        self.declared_queues.clear()
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except AMQPError:
+                pass
+
+    # Publish messages in order, PUBLISH_CHUNK_SIZE per transaction, and return how many were published.
+    # Raises PublishError, carrying the committed count, once PUBLISH_ATTEMPTS connections have failed
+    # or on any other broker or socket error.
+    def publish_batch(self, messages, queue=REVOKE_QUEUE):
+        properties = pika.BasicProperties(
             delivery_mode=2,  # Make message persistent
         )
-    )
-    connection.close()
+        return self.publish_bodies([json.dumps(data) for data in messages], queue, properties)
+
+    # Publish encoded message bodies with the given properties, same guarantees as publish_batch.
+    # Queues declared with arguments elsewhere, like the retry and dead-letter queues, pass declare_queue=False.
+    def publish_bodies(self, bodies, queue, properties, declare_queue=True):
+        with self.lock:
+            published = 0
+            for attempt in range(1, PUBLISH_ATTEMPTS + 1):
+                try:
+                    channel = self.get_channel()
+                    if declare_queue and queue not in self.declared_queues:
+                        channel.queue_declare(queue=queue, durable=True)
+                        self.declared_queues.add(queue)
+                    # resume after the last committed chunk, the broker drops the uncommitted part of a
+                    # transaction when its channel closes, so a reconnect does not publish duplicates
+                    while published < len(bodies):
+                        chunk = bodies[published:published + PUBLISH_CHUNK_SIZE]
+                        for body in chunk:
+                            channel.basic_publish(exchange='', routing_key=queue, body=body, properties=properties)
+                        channel.tx_commit()
+                        published += len(chunk)
+                    return published
+                except (AMQPConnectionError, AMQPChannelError) as e:
+                    self.reset()
+                    if attempt == PUBLISH_ATTEMPTS:
+                        raise PublishError(published, e) from e
+                    print(f"Publishing to {queue} failed, reconnecting: {e}")
+                except (AMQPError, OSError) as e:
+                    self.reset()
+                    raise PublishError(published, e) from e
+
+    def publish(self, data, queue=REVOKE_QUEUE):
+        self.publish_batch([data], queue)
+
+    def close(self):
+        with self.lock:
+            self.reset()
+
+
+# shared publisher for every thread in this process
+publisher = Publisher()
+
+def publish_to_queue(data, queue=REVOKE_QUEUE):
+    publisher.publish(data, queue)
+
+def publish_batch(messages, queue=REVOKE_QUEUE):
+    return publisher.publish_batch(messages, queue)
+
+# Names of the retry queues of a work queue, one per delay in milliseconds
+def retry_queue_name(queue, delay_ms):
+    return f"{queue}.retry.{delay_ms}"
+
+def dead_letter_queue_name(queue):
+    return f"{queue}.dlq"
+
+# Declare a work queue with one delay queue per retry and a dead-letter queue.
+# Messages parked in a retry queue expire after its TTL and are dead-lettered back onto the work queue.
+def declare_retry_queues(channel, queue, retry_delays_ms):
+    channel.queue_declare(queue=queue, durable=True)
+    for delay_ms in retry_delays_ms:
+        channel.queue_declare(
+            queue=retry_queue_name(queue, delay_ms),
+            durable=True,
+            arguments={
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue
+            }
+        )
+    channel.queue_declare(queue=dead_letter_queue_name(queue), durable=True)
+
+# Schedule another attempt of a failed message, or park it in the dead-letter queue once retries run out.
+# The copy keeps the message's properties, only its headers change, and is committed by the publisher before this
+# returns, so the caller can ack the original. Returns the queue the message was moved to, raises PublishError
+# if the broker did not take the copy.
+def retry_or_dead_letter(publisher, queue, body, properties, retry_delays_ms, error=None):
+    headers = dict((properties.headers if properties else None) or {})
+    attempt = headers.get("x-retry-count", 0)
+    headers["x-retry-count"] = attempt + 1
+    if error is not None:
+        headers["x-last-error"] = str(error)[:255]
+
+    if attempt < len(retry_delays_ms):
+        target = retry_queue_name(queue, retry_delays_ms[attempt])
+    else:
+        target = dead_letter_queue_name(queue)
+
+    if properties is None:
+        retry_properties = pika.BasicProperties(delivery_mode=2, headers=headers)
+    else:
+        retry_properties = copy.copy(properties)
+        retry_properties.headers = headers
+
+    publisher.publish_bodies([body], target, retry_properties, declare_queue=False)
+    return target
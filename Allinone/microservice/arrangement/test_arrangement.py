@@ -1,5 +1,9 @@
 import pytest
-from ..arrangement.arrangement import app, db, Arrangement
+from datetime import date
+import json
+from unittest import mock
+from ..arrangement import arrangement as service
+from ..arrangement.arrangement import app, db, Arrangement, Team_WFH_Occupancy, Employee, Employee_Hierarchy, rebuild_occupancy
 
 @pytest.fixture
 def client():
@@ -21,7 +25,7 @@ def sample_arrangement():
             request_id=1,
             arrangement_id=1,
             staff_id=140002,
-            arrangement_date="2024-10-01",
+            arrangement_date=date(2024, 10, 1),
             timeslot="AM",
             reason="Medical Appointment"
         )
@@ -29,6 +33,21 @@ def sample_arrangement():
         db.session.commit()
         return arrangement
 
+def sample_arrangement_on(arrangement_date, request_id=1, arrangement_id=1, staff_id=140002, timeslot="AM"):
+    """Create a sample arrangement on a given date"""
+    with app.app_context():
+        arrangement = Arrangement(
+            request_id=request_id,
+            arrangement_id=arrangement_id,
+            staff_id=staff_id,
+            arrangement_date=arrangement_date,
+            timeslot=timeslot,
+            reason=""
+        )
+        db.session.add(arrangement)
+        db.session.commit()
+        return arrangement
+
 def test_create_arrangement_success(client):
     data = {
         "request_id": 20,
@@ -72,7 +91,7 @@ def test_get_arrangements_by_staff_id(client):
                 request_id=1,
                 arrangement_id=1,
                 staff_id=140002,
-                arrangement_date="2024-10-01",
+                arrangement_date=date(2024, 10, 1),
                 timeslot="AM",
                 reason="Medical Appointment"
             ),
@@ -80,7 +99,7 @@ def test_get_arrangements_by_staff_id(client):
                 request_id=17,
                 arrangement_id=1,
                 staff_id=140002,
-                arrangement_date="2024-11-01",
+                arrangement_date=date(2024, 11, 1),
                 timeslot="AM",
                 reason=""
             )
@@ -114,10 +133,223 @@ def test_create_arrangement_duplicate_request_id(client):
     data = {
         "request_id": 1,
         "staff_id": 140002,
-        "arrangement_date": "2024-10-15",
+        "arrangement_date": "2024-10-01",
         "timeslot": "AM",
         "reason": "Team meeting"
     }
     response = client.post('/create_arrangement', json=data)
     assert response.status_code == 409
     assert response.json['message'] == 'Arrangement already exists for this date and timeslot'
+
+def test_get_all_arrangements_paginated(client):
+    with app.app_context():
+        db.session.add_all([
+            Arrangement(request_id=1, arrangement_id=1, staff_id=140002, arrangement_date=date(2024, 10, 1), timeslot="AM", reason=""),
+            Arrangement(request_id=1, arrangement_id=2, staff_id=140002, arrangement_date=date(2024, 10, 8), timeslot="AM", reason=""),
+            Arrangement(request_id=2, arrangement_id=1, staff_id=140003, arrangement_date=date(2024, 10, 2), timeslot="PM", reason="")
+        ])
+        db.session.commit()
+
+    response = client.get('/get_all_arrangements?limit=2')
+    assert response.status_code == 200
+    assert [(arr['request_id'], arr['arrangement_id']) for arr in response.json['data']] == [(1, 1), (1, 2)]
+    assert response.json['next_cursor'] == "1:2"
+
+    response = client.get(f"/get_all_arrangements?limit=2&after={response.json['next_cursor']}")
+    assert [(arr['request_id'], arr['arrangement_id']) for arr in response.json['data']] == [(2, 1)]
+    assert response.json['next_cursor'] is None
+
+    response = client.get('/get_all_arrangements?from=2024-10-02&to=2024-10-31&timeslot=AM')
+    assert [arr['arrangement_date'] for arr in response.json['data']] == ["2024-10-08"]
+
+def test_get_all_arrangements_invalid_cursor(client):
+    response = client.get('/get_all_arrangements?after=abc')
+    assert response.status_code == 400
+
+def test_get_all_arrangements_ndjson(client):
+    sample_arrangement_on(date(2024, 10, 1))
+    response = client.get('/get_all_arrangements', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [(arr['request_id'], arr['arrangement_date']) for arr in lines] == [(1, "2024-10-01")]
+
+def test_get_all_arrangements_ndjson_reads_in_chunks(client):
+    for request_id, arrangement_id, arrangement_date in [(2, 1, date(2024, 10, 3)), (1, 2, date(2024, 10, 2)),
+                                                         (1, 1, date(2024, 10, 1))]:
+        sample_arrangement_on(arrangement_date, request_id=request_id, arrangement_id=arrangement_id)
+
+    with mock.patch.object(service, "STREAM_BATCH_SIZE", 2):
+        response = client.get('/get_all_arrangements', headers={'Accept': 'application/x-ndjson'})
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+
+    assert [(arr['request_id'], arr['arrangement_id']) for arr in lines] == [(1, 1), (1, 2), (2, 1)]
+
+def test_create_arrangements_bulk(client):
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1)
+    data = {
+        "request_id": 1,
+        "staff_id": 140002,
+        "arrangement_dates": ["2024-10-08", "2024-10-15"],
+        "timeslot": "AM",
+        "reason": "Recurring"
+    }
+    response = client.post('/create_arrangements/bulk', json=data)
+    assert response.status_code == 201
+    assert [(a['arrangement_id'], a['arrangement_date']) for a in response.json['data']] == [(2, "2024-10-08"), (3, "2024-10-15")]
+
+    with app.app_context():
+        assert Arrangement.query.filter_by(request_id=1).count() == 3
+
+def test_create_arrangements_bulk_conflict_rolls_back(client):
+    sample_arrangement_on(date(2024, 10, 15), request_id=1, arrangement_id=1)
+    data = {
+        "request_id": 2,
+        "staff_id": 140002,
+        "arrangement_dates": ["2024-10-08", "2024-10-15"],
+        "timeslot": "AM",
+        "reason": ""
+    }
+    response = client.post('/create_arrangements/bulk', json=data)
+    assert response.status_code == 409
+    assert response.json['data']['taken_dates'] == ["2024-10-15"]
+
+    with app.app_context():
+        assert Arrangement.query.filter_by(request_id=2).count() == 0
+
+def test_create_arrangements_bulk_retries_ids_taken_concurrently(client):
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1)
+    data = {"request_id": 1, "staff_id": 140002, "arrangement_dates": ["2024-10-08"], "timeslot": "AM", "reason": ""}
+
+    # the first read of the next id happened before the concurrent approval inserted arrangement 1
+    with mock.patch.object(service, "get_next_arrangement_id", side_effect=[1, 2]):
+        response = client.post('/create_arrangements/bulk', json=data)
+
+    assert response.status_code == 201
+    assert [(a['arrangement_id'], a['arrangement_date']) for a in response.json['data']] == [(2, "2024-10-08")]
+
+def test_create_arrangements_bulk_invalid_dates(client):
+    data = {"request_id": 1, "staff_id": 140002, "arrangement_dates": ["15/10/2024"], "timeslot": "AM"}
+    response = client.post('/create_arrangements/bulk', json=data)
+    assert response.status_code == 400
+
+def test_withdraw_arrangements_bulk(client):
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1)
+    sample_arrangement_on(date(2024, 10, 8), request_id=1, arrangement_id=2)
+    sample_arrangement_on(date(2024, 10, 15), request_id=2, arrangement_id=1)
+
+    response = client.delete('/withdraw_arrangements/bulk', json={"arrangements": [[1, 2], [2, 1], [9, 9]]})
+    assert response.status_code == 200
+    assert response.json['data']['deleted'] == 2
+
+    with app.app_context():
+        assert [(a.request_id, a.arrangement_id) for a in Arrangement.query.all()] == [(1, 1)]
+
+def test_withdraw_arrangements_bulk_invalid_payload(client):
+    response = client.delete('/withdraw_arrangements/bulk', json={"arrangements": [["a", "b"]]})
+    assert response.status_code == 400
+
+def sample_team():
+    """Create a manager with two team members"""
+    with app.app_context():
+        db.session.add_all([
+            Employee(staff_id=140001, staff_fname="Derek", staff_lname="Tan", dept="Sales", position="Director",
+                     country="Singapore", email="derek@allinone.com", reporting_manager=130002, role=1),
+            Employee(staff_id=140002, staff_fname="Susan", staff_lname="Goh", dept="Sales", position="Account Manager",
+                     country="Singapore", email="susan@allinone.com", reporting_manager=140001, role=2),
+            Employee(staff_id=140003, staff_fname="Janice", staff_lname="Chan", dept="Sales", position="Account Manager",
+                     country="Singapore", email="janice@allinone.com", reporting_manager=140001, role=2),
+        ])
+        db.session.commit()
+
+def get_occupancy():
+    with app.app_context():
+        return {(row.manager_id, str(row.occupancy_date)): (row.am_count, row.pm_count, row.team_size)
+                for row in Team_WFH_Occupancy.query.all()}
+
+def test_occupancy_follows_bulk_create_and_withdraw(client):
+    sample_team()
+    client.post('/create_arrangements/bulk', json={
+        "request_id": 1, "staff_id": 140002, "arrangement_dates": ["2024-10-08", "2024-10-15"], "timeslot": "FULL"
+    })
+    client.post('/create_arrangements/bulk', json={
+        "request_id": 2, "staff_id": 140003, "arrangement_dates": ["2024-10-08"], "timeslot": "AM"
+    })
+    assert get_occupancy() == {(140001, "2024-10-08"): (2, 1, 2), (140001, "2024-10-15"): (1, 1, 2)}
+
+    client.delete('/withdraw_arrangements/bulk', json={"arrangements": [[1, 1]]})
+    assert get_occupancy()[(140001, "2024-10-08")] == (1, 0, 2)
+
+def test_withdrawing_an_uncounted_arrangement_recounts_occupancy(client):
+    sample_team()
+    # written before the occupancy table existed, so no occupancy row counts them yet
+    sample_arrangement_on(date(2024, 10, 8), request_id=1, arrangement_id=1, staff_id=140002, timeslot="FULL")
+    sample_arrangement_on(date(2024, 10, 8), request_id=2, arrangement_id=1, staff_id=140003, timeslot="AM")
+
+    client.delete('/withdraw_arrangements/bulk', json={"arrangements": [[2, 1]]})
+    assert get_occupancy() == {(140001, "2024-10-08"): (1, 1, 2)}
+
+    client.delete('/withdraw_arrangements/bulk', json={"arrangements": [[1, 1]]})
+    assert get_occupancy() == {(140001, "2024-10-08"): (0, 0, 2)}
+
+def test_rebuild_occupancy(client):
+    sample_team()
+    sample_arrangement_on(date(2024, 10, 8), request_id=1, arrangement_id=1, staff_id=140002, timeslot="PM")
+    sample_arrangement_on(date(2024, 10, 8), request_id=2, arrangement_id=1, staff_id=140003, timeslot="FULL")
+
+    with app.app_context():
+        assert rebuild_occupancy() == 1
+    assert get_occupancy() == {(140001, "2024-10-08"): (1, 2, 2)}
+
+def test_get_team_schedule(client):
+    sample_team()
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1, staff_id=140002, timeslot="AM")
+    sample_arrangement_on(date(2024, 10, 3), request_id=2, arrangement_id=1, staff_id=140003, timeslot="FULL")
+    sample_arrangement_on(date(2024, 10, 3), request_id=3, arrangement_id=1, staff_id=140002, timeslot="PM")
+    sample_arrangement_on(date(2024, 11, 1), request_id=4, arrangement_id=1, staff_id=140002, timeslot="AM")
+
+    response = client.get('/schedule/team/140001?from=2024-10-01&to=2024-10-03')
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert [member["staff_id"] for member in data["members"]] == [140002, 140003]
+    assert data["am"] == ["1", "0", "2"]
+    assert data["pm"] == ["0", "0", "3"]
+
+def test_get_team_schedule_invalid_range(client):
+    sample_team()
+    assert client.get('/schedule/team/140001?from=2024-10-03&to=2024-10-01').status_code == 400
+    assert client.get('/schedule/team/140001?from=2024-01-01&to=2024-12-31').status_code == 400
+    assert client.get('/schedule/team/999999?from=2024-10-01&to=2024-10-03').status_code == 404
+
+def test_get_heatmap_by_dept(client):
+    sample_team()
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1, staff_id=140002, timeslot="AM")
+    sample_arrangement_on(date(2024, 10, 1), request_id=2, arrangement_id=1, staff_id=140003, timeslot="FULL")
+
+    response = client.get('/heatmap?group_by=dept&from=2024-10-01&to=2024-10-31')
+    assert response.status_code == 200
+    assert response.get_json()["data"]["groups"] == [{
+        "group": "Sales",
+        "headcount": 3,
+        "days": [{"date": "2024-10-01", "am_count": 2, "pm_count": 1, "am_ratio": 0.6667, "pm_ratio": 0.3333}]
+    }]
+
+def test_get_heatmap_invalid_group(client):
+    assert client.get('/heatmap?group_by=team').status_code == 400
+
+def test_get_all_arrangements_under_manager(client):
+    sample_team()
+    with app.app_context():
+        db.session.execute(Employee_Hierarchy.__table__.insert(), [
+            {"ancestor_id": 130002, "descendant_id": 140001, "depth": 1},
+            {"ancestor_id": 140001, "descendant_id": 140002, "depth": 1},
+            {"ancestor_id": 130002, "descendant_id": 140002, "depth": 2},
+        ])
+        db.session.commit()
+    sample_arrangement_on(date(2024, 10, 1), request_id=1, arrangement_id=1, staff_id=140002)
+    sample_arrangement_on(date(2024, 10, 1), request_id=2, arrangement_id=1, staff_id=140003)
+
+    response = client.get('/get_all_arrangements?under=130002')
+    assert response.status_code == 200
+    assert [arrangement["staff_id"] for arrangement in response.get_json()["data"]] == [140002]
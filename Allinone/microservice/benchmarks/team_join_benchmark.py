@@ -0,0 +1,150 @@
+"""
+Team join latency with Employee.reporting_manager as VARCHAR(50) vs INT.
+
+Loads a synthetic org into scratch tables next to the real ones, runs the team queries the services make
+(count_wfh_by_date, get_team_by_manager, the manage_blockout join) against both column types and prints
+the median and p95 latency. The scratch tables are dropped afterwards.
+
+    dbURL=mysql+mysqlconnector://root@localhost:3306/spm_db python benchmarks/team_join_benchmark.py
+
+On MySQL an integer compared with a VARCHAR column is cast row by row, so the VARCHAR table cannot use
+its index. SQLite has no such cast and shows both column types at about the same speed.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from os import environ
+
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URI = environ.get("dbURL") or "mysql+mysqlconnector://root@localhost:3306/spm_db"
+
+COLUMN_TYPES = {
+    "varchar": "VARCHAR(50)",
+    "int": "INT",
+}
+
+QUERIES = {
+    # manage_request.count_wfh_by_date
+    "team wfh by date": """
+        SELECT a.arrangement_date, COUNT(*)
+        FROM Bench_Arrangement a JOIN {employee} e ON e.staff_id = a.staff_id
+        WHERE e.reporting_manager = :manager_id
+        GROUP BY a.arrangement_date
+    """,
+    # employee.get_team_by_manager
+    "team members": """
+        SELECT staff_id, email FROM {employee} WHERE reporting_manager = :manager_id
+    """,
+    # manage_blockout.find_clashing_arrangements scoped to a team
+    "team arrangements in range": """
+        SELECT a.staff_id, a.arrangement_date, e.email
+        FROM {employee} e JOIN Bench_Arrangement a ON a.staff_id = e.staff_id
+        WHERE e.reporting_manager = :manager_id AND a.arrangement_date BETWEEN :start_date AND :end_date
+    """,
+}
+
+
+def create_tables(connection, employees, arrangements):
+    for name, column_type in COLUMN_TYPES.items():
+        connection.execute(text(f"DROP TABLE IF EXISTS Bench_Employee_{name}"))
+        connection.execute(text(f"""
+            CREATE TABLE Bench_Employee_{name} (
+                staff_id INT PRIMARY KEY,
+                email VARCHAR(50) NOT NULL,
+                reporting_manager {column_type} NOT NULL
+            )
+        """))
+        connection.execute(text(
+            f"CREATE INDEX ix_bench_{name}_reporting_manager ON Bench_Employee_{name} (reporting_manager)"
+        ))
+        connection.execute(
+            text(f"INSERT INTO Bench_Employee_{name} (staff_id, email, reporting_manager) "
+                 f"VALUES (:staff_id, :email, :reporting_manager)"),
+            [{**employee, "reporting_manager": str(employee["reporting_manager"]) if name == "varchar"
+              else employee["reporting_manager"]} for employee in employees]
+        )
+
+    connection.execute(text("DROP TABLE IF EXISTS Bench_Arrangement"))
+    connection.execute(text("""
+        CREATE TABLE Bench_Arrangement (
+            staff_id INT NOT NULL,
+            arrangement_date DATE NOT NULL
+        )
+    """))
+    connection.execute(text("CREATE INDEX ix_bench_arrangement_staff_date ON Bench_Arrangement (staff_id, arrangement_date)"))
+    connection.execute(
+        text("INSERT INTO Bench_Arrangement (staff_id, arrangement_date) VALUES (:staff_id, :arrangement_date)"),
+        arrangements
+    )
+
+def drop_tables(connection):
+    for name in COLUMN_TYPES:
+        connection.execute(text(f"DROP TABLE IF EXISTS Bench_Employee_{name}"))
+    connection.execute(text("DROP TABLE IF EXISTS Bench_Arrangement"))
+
+# A flat org of team_size employees under each manager, and a few arrangements per employee
+def synthetic_org(employee_count, team_size, arrangements_per_employee, seed):
+    rng = random.Random(seed)
+    managers = list(range(1, employee_count // team_size + 1))
+    employees = [
+        {"staff_id": staff_id, "email": f"staff{staff_id}@allinone.com", "reporting_manager": rng.choice(managers)}
+        for staff_id in range(1, employee_count + 1)
+    ]
+    first_day = date(2024, 10, 1)
+    arrangements = [
+        {"staff_id": staff_id, "arrangement_date": first_day + timedelta(days=day)}
+        for staff_id in range(1, employee_count + 1)
+        for day in rng.sample(range(90), arrangements_per_employee)
+    ]
+    return managers, employees, arrangements
+
+def time_query(connection, sql, manager_ids):
+    latencies = []
+    for manager_id in manager_ids:
+        started_at = time.perf_counter()
+        connection.execute(text(sql), {
+            "manager_id": manager_id,
+            "start_date": date(2024, 10, 1),
+            "end_date": date(2024, 10, 31)
+        }).fetchall()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--team-size", type=int, default=50)
+    parser.add_argument("--arrangements", type=int, default=5, help="arrangements per employee")
+    parser.add_argument("--runs", type=int, default=200, help="queries per measurement")
+    parser.add_argument("--seed", type=int, default=212)
+    args = parser.parse_args()
+
+    managers, employees, arrangements = synthetic_org(args.employees, args.team_size, args.arrangements, args.seed)
+    manager_ids = random.Random(args.seed).choices(managers, k=args.runs)
+
+    engine = create_engine(DATABASE_URI)
+    with engine.begin() as connection:
+        create_tables(connection, employees, arrangements)
+    try:
+        print(f"{engine.dialect.name}: {len(employees)} employees, {len(arrangements)} arrangements, "
+              f"{args.runs} queries per measurement")
+        print(f"{'query':<28}{'column':<10}{'median ms':>12}{'p95 ms':>10}")
+        with engine.connect() as connection:
+            for query_name, sql in QUERIES.items():
+                for name in COLUMN_TYPES:
+                    median, p95 = time_query(connection, sql.format(employee=f"Bench_Employee_{name}"), manager_ids)
+                    print(f"{query_name:<28}{name:<10}{median:>12.3f}{p95:>10.3f}")
+    finally:
+        with engine.begin() as connection:
+            drop_tables(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import pytest
 import os
-from ..blockout.blockout import app, db, BlockoutDates
+from ..blockout.blockout import app, db, BlockoutDates, BlockoutIndex, blockout_index
 from datetime import date
 import json
 
@@ -119,3 +119,59 @@ def test_create_blockout_invalid_date_format(client):
     response = client.post('/blockout/create_blockout', json=data)
     assert response.status_code == 500
     assert b"Failed to create blockout" in response.data
+
+def test_check_dates(client, sample_blockouts):
+    blockout_index.invalidate()
+    data = {"arrangement_dates": ["2024-11-11", "2024-11-12", "2024-12-25"], "timeslot": "AM"}
+    response = client.post('/blockout/check_dates', json=data)
+    assert response.status_code == 200
+    blocked = response.json['data']['blocked']
+    assert [item['date'] for item in blocked] == ["2024-11-11", "2024-12-25"]
+    assert blocked[0]['blockouts'][0]['title'] == "Veterans Day"
+
+def test_check_dates_half_day_blockout(client):
+    blockout_index.invalidate()
+    data = {
+        "start_date": "2024-10-14",
+        "end_date": "2024-10-18",
+        "timeslot": {"anchorKey": "PM"},
+        "title": "Offsite",
+        "blockout_description": "Team offsite"
+    }
+    client.post('/blockout/create_blockout', json=data)
+
+    response = client.post('/blockout/check_dates', json={"arrangement_dates": ["2024-10-16"], "timeslot": "AM"})
+    assert response.json['data']['blocked'] == []
+
+    response = client.post('/blockout/check_dates', json={"arrangement_dates": ["2024-10-16", "2024-10-19"], "timeslot": "FULL"})
+    assert [item['date'] for item in response.json['data']['blocked']] == ["2024-10-16"]
+
+def test_check_dates_invalid_timeslot(client):
+    response = client.post('/blockout/check_dates', json={"arrangement_dates": ["2024-10-16"], "timeslot": "EVENING"})
+    assert response.status_code == 400
+
+def test_blockout_index_finds_overlapping_blockouts():
+    index = BlockoutIndex()
+    slots = index.build([
+        (1, "A", date(2024, 10, 1), date(2024, 10, 5), "FULL"),
+        (2, "B", date(2024, 10, 4), date(2024, 10, 10), "AM"),
+        (3, "C", date(2024, 10, 20), date(2024, 10, 20), "PM"),
+        (4, "D", date(2024, 10, 6), date(2024, 10, 6), "AM"),
+    ])
+    assert slots["AM"][1] == [date(2024, 10, day).toordinal() for day in (5, 10, 10)]
+    assert [blockout[0] for blockout in index.find(slots, "AM", date(2024, 10, 4))] == [1, 2]
+    assert [blockout[0] for blockout in index.find(slots, "AM", date(2024, 10, 6))] == [2, 4]
+    assert [blockout[0] for blockout in index.find(slots, "AM", date(2024, 10, 8))] == [2]
+    assert index.find(slots, "AM", date(2024, 10, 20)) == []
+    assert [blockout[0] for blockout in index.find(slots, "PM", date(2024, 10, 20))] == [3]
+
+def test_blockout_index_sees_blockouts_from_other_processes(client):
+    with app.app_context():
+        blockout_index.invalidate()
+        assert blockout_index.check([(date(2024, 10, 16), "AM")]) == []
+
+        # written without going through create_blockout, so nothing invalidated this process's index
+        db.session.add(BlockoutDates(start_date=date(2024, 10, 14), end_date=date(2024, 10, 18), timeslot="FULL",
+                                     title="Offsite", blockout_description=""))
+        db.session.commit()
+        assert [item["date"] for item in blockout_index.check([(date(2024, 10, 16), "AM")])] == ["2024-10-16"]
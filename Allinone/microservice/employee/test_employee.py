@@ -1,6 +1,6 @@
 import unittest
 from flask import json
-from ..employee.employee import app, db, Employee
+from ..employee.employee import app, db, Employee, Employee_Hierarchy, rebuild_hierarchy
 
 class TestEmployee(unittest.TestCase):
     @classmethod
@@ -30,7 +30,7 @@ class TestEmployee(unittest.TestCase):
                 position='Developer',
                 country='USA',
                 email='john.doe@example.com',
-                reporting_manager='2',
+                reporting_manager=2,
                 role=2
             ),
             Employee(
@@ -41,7 +41,7 @@ class TestEmployee(unittest.TestCase):
                 position='Manager',
                 country='USA',
                 email='jane.smith@example.com',
-                reporting_manager='3',
+                reporting_manager=3,
                 role=3
             )
         ]
@@ -68,7 +68,7 @@ class TestEmployee(unittest.TestCase):
             'position': 'Developer',
             'country': 'USA',
             'email': 'john.doe@example.com',
-            'reporting_manager': '2',
+            'reporting_manager': 2,
             'role': 2
         }
         self.assertEqual(employee.to_dict(), expected_dict)
@@ -84,7 +84,7 @@ class TestEmployee(unittest.TestCase):
             'position': 'Developer',
             'country': 'USA',
             'email': 'john.doe@example.com',
-            'reporting_manager': '2',
+            'reporting_manager': 2,
             'role_num': 2,
             'role': 'Staff'
         }
@@ -162,7 +162,7 @@ class TestEmployee(unittest.TestCase):
             position='Developer',
             country='USA',
             email='bob.wilson@example.com',
-            reporting_manager='2',
+            reporting_manager=2,
             role=2
         )
         db.session.add(team_member)
@@ -185,5 +185,127 @@ class TestEmployee(unittest.TestCase):
         self.assertEqual(data['message'], 'No team members found for this manager')
         self.assertEqual(data['code'], 404)
 
+    def test_all_users_paginated(self):
+        """Test keyset pagination of all users"""
+        response = self.client.get('/users?limit=1')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['staff_id'] for employee in data['data']], [1])
+        self.assertEqual(data['next_cursor'], '1')
+
+        response = self.client.get(f"/users?limit=1&after={data['next_cursor']}")
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['staff_id'] for employee in data['data']], [2])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_all_users_filtered(self):
+        """Test filtering all users by department"""
+        response = self.client.get('/users?dept=HR')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['staff_id'] for employee in data['data']], [2])
+
+    def test_all_users_invalid_limit(self):
+        """Test an out of range page size is rejected"""
+        response = self.client.get('/users?limit=0')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['code'], 400)
+
+    def test_get_users_batch_by_staff_ids(self):
+        """Test batch retrieval of users keyed by staff_id"""
+        response = self.client.post('/users/batch', json={'staff_ids': [1, 2, 999]})
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(data['data'].keys()), {'1', '2'})
+        self.assertEqual(data['data']['2']['email'], 'jane.smith@example.com')
+        self.assertEqual(data['missing'], [999])
+
+    def test_get_users_batch_by_emails(self):
+        """Test batch retrieval of users by email"""
+        response = self.client.post('/users/batch', json={'emails': ['john.doe@example.com', 'nobody@example.com']})
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data['data'].keys()), ['1'])
+        self.assertEqual(data['missing'], ['nobody@example.com'])
+
+    def test_get_users_batch_invalid_body(self):
+        """Test batch retrieval without ids is rejected"""
+        response = self.client.post('/users/batch', json={})
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['message'], 'Provide a list of staff_ids or emails')
+
+    def add_top_manager(self):
+        """Add employee 3 above Jane, reporting to itself like the CEO"""
+        db.session.add(Employee(
+            staff_id=3,
+            staff_fname='Jack',
+            staff_lname='Sim',
+            dept='CEO',
+            position='MD',
+            country='USA',
+            email='jack.sim@example.com',
+            reporting_manager=3,
+            role=1
+        ))
+        db.session.commit()
+
+    def test_rebuild_hierarchy(self):
+        """Test the closure table covers every level and stops at the self-reporting top manager"""
+        self.add_top_manager()
+        self.assertEqual(rebuild_hierarchy(), 6)
+
+        rows = {(row.ancestor_id, row.descendant_id): row.depth for row in Employee_Hierarchy.query.all()}
+        self.assertEqual(rows, {(1, 1): 0, (2, 2): 0, (3, 3): 0, (2, 1): 1, (3, 2): 1, (3, 1): 2})
+
+    def test_rebuild_hierarchy_reporting_cycle(self):
+        """Test a reporting line that loops back does not hang the rebuild"""
+        self.add_top_manager()
+        Employee.query.filter_by(staff_id=3).update({'reporting_manager': 1})
+        db.session.commit()
+
+        rebuild_hierarchy()
+        depths = sorted(row.depth for row in Employee_Hierarchy.query.filter_by(descendant_id=1))
+        self.assertEqual(depths, [0, 1, 2])
+
+    def test_get_descendants(self):
+        """Test retrieval of every employee under a manager, nearest first"""
+        self.add_top_manager()
+        rebuild_hierarchy()
+
+        response = self.client.get('/users/3/descendants')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(employee['staff_id'], employee['depth']) for employee in data['data']], [(2, 1), (1, 2)])
+
+        response = self.client.get('/users/3/descendants?max_depth=1')
+        data = json.loads(response.data)
+        self.assertEqual([employee['staff_id'] for employee in data['data']], [2])
+
+        response = self.client.get('/users/1/descendants')
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_manager_chain(self):
+        """Test retrieval of the managers above an employee"""
+        self.add_top_manager()
+        rebuild_hierarchy()
+
+        response = self.client.get('/users/1/managers')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['staff_id'] for employee in data['data']], [2, 3])
+
+        response = self.client.get('/users/3/managers')
+        self.assertEqual(response.status_code, 404)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from flask import request, jsonify
+from dotenv import load_dotenv
+
+import service_client
+
+load_dotenv()
+
+EMPLOYEE_MICROSERVICE_URL = os.getenv("EMPLOYEE_MICROSERVICE_URL")
+
+# employee records almost never change, so lookups are cached in-process
+EMPLOYEE_CACHE_TTL = float(os.getenv("EMPLOYEE_CACHE_TTL", 300))
+EMPLOYEE_NEGATIVE_CACHE_TTL = float(os.getenv("EMPLOYEE_NEGATIVE_CACHE_TTL", 30))
+EMPLOYEE_CACHE_SIZE = int(os.getenv("EMPLOYEE_CACHE_SIZE", 2048))
+# ids per /users/batch call, the employee service accepts at most 1000
+EMPLOYEE_BATCH_SIZE = 500
+
+# sentinel for keys that are not in the cache, since None is a cached "not found"
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache where every entry expires after its own TTL."""
+
+    def __init__(self, maxsize, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, self.clock() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class EmployeeDirectory:
+    """
+    Cached client for the employee microservice.
+    Found employees are kept for ttl seconds, 404s for negative_ttl seconds, other failures are not cached.
+    """
+
+    def __init__(self, base_url=EMPLOYEE_MICROSERVICE_URL, ttl=EMPLOYEE_CACHE_TTL,
+                 negative_ttl=EMPLOYEE_NEGATIVE_CACHE_TTL, maxsize=EMPLOYEE_CACHE_SIZE, clock=time.monotonic, client=None):
+        self.client = client or service_client.get_client(base_url)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize, clock)
+        self.stats_lock = threading.Lock()
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0, "errors": 0}
+        self.lookup_count = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+    # Get an employee record as returned by /user/<staff_id>, None if the employee does not exist or the lookup failed
+    def get_user(self, staff_id):
+        key = str(staff_id)
+        employee_data = self.cache.get(key)
+        if employee_data is not MISSING:
+            self.count("hits" if employee_data is not None else "negative_hits")
+            return employee_data
+
+        self.count("misses")
+        started_at = time.perf_counter()
+        try:
+            response = self.client.get(f"/user/{key}")
+        except requests.exceptions.RequestException as e:
+            self.count("errors")
+            print(f"[employee_directory] Failed to fetch employee {key}: {e}")
+            return None
+        finally:
+            self.record_latency(time.perf_counter() - started_at)
+
+        if response.status_code == 200:
+            employee_data = response.json().get("data")
+            self.cache.set(key, employee_data, self.ttl)
+            return employee_data
+        if response.status_code == 404:
+            self.cache.set(key, None, self.negative_ttl)
+            return None
+
+        self.count("errors")
+        print(f"[employee_directory] Failed to fetch employee {key}: HTTP {response.status_code}")
+        return None
+
+    # Get many employee records keyed by str(staff_id), cache misses are fetched with concurrent /users/batch calls.
+    # Employees that do not exist map to None, ids whose lookup failed are left out.
+    def get_users(self, staff_ids):
+        employees_data = {}
+        missing_keys = []
+        for key in dict.fromkeys(str(staff_id) for staff_id in staff_ids):
+            employee_data = self.cache.get(key)
+            if employee_data is MISSING:
+                missing_keys.append(key)
+            else:
+                self.count("hits" if employee_data is not None else "negative_hits")
+                employees_data[key] = employee_data
+
+        if not missing_keys:
+            return employees_data
+
+        self.count("misses", len(missing_keys))
+        chunks = [missing_keys[start:start + EMPLOYEE_BATCH_SIZE] for start in range(0, len(missing_keys), EMPLOYEE_BATCH_SIZE)]
+        for chunk_data in service_client.fan_out(lambda chunk=chunk: self.fetch_batch(chunk) for chunk in chunks):
+            employees_data.update(chunk_data)
+        return employees_data
+
+    # Fetch one chunk of employees from /users/batch and cache the results, empty if the call failed
+    def fetch_batch(self, keys):
+        started_at = time.perf_counter()
+        try:
+            response = self.client.post("/users/batch", json={"staff_ids": keys})
+        except requests.exceptions.RequestException as e:
+            response = None
+            print(f"[employee_directory] Failed to fetch employees {keys}: {e}")
+        finally:
+            self.record_latency(time.perf_counter() - started_at)
+
+        if response is None or response.status_code != 200:
+            self.count("errors", len(keys))
+            if response is not None:
+                print(f"[employee_directory] Failed to fetch employees {keys}: HTTP {response.status_code}")
+            return {}
+
+        found = response.json().get("data", {})
+        employees_data = {}
+        for key in keys:
+            employee_data = found.get(key)
+            self.cache.set(key, employee_data, self.ttl if employee_data is not None else self.negative_ttl)
+            employees_data[key] = employee_data
+        return employees_data
+
+    # Get the email of a manager, None if the manager does not exist
+    def get_manager_email(self, manager_id):
+        manager_data = self.get_user(manager_id)
+        return manager_data.get("email") if manager_data else None
+
+    # Drop one employee, or the whole cache when staff_id is None
+    def invalidate(self, staff_id=None):
+        self.cache.invalidate(None if staff_id is None else str(staff_id))
+
+    def count(self, counter, amount=1):
+        with self.stats_lock:
+            self.counters[counter] += amount
+
+    def record_latency(self, seconds):
+        with self.stats_lock:
+            self.lookup_count += 1
+            self.lookup_seconds += seconds
+            self.max_lookup_seconds = max(self.max_lookup_seconds, seconds)
+
+    def stats(self):
+        with self.stats_lock:
+            avg_ms = (self.lookup_seconds / self.lookup_count * 1000) if self.lookup_count else 0.0
+            return {
+                **self.counters,
+                "size": len(self.cache),
+                "lookups": self.lookup_count,
+                "avg_lookup_ms": round(avg_ms, 3),
+                "max_lookup_ms": round(self.max_lookup_seconds * 1000, 3)
+            }
+
+    # Register the invalidation hook and stats endpoint on a service
+    def init_app(self, app):
+        def invalidate_employee_cache():
+            data = request.get_json(silent=True) or {}
+            self.invalidate(data.get("staff_id"))
+            return jsonify({"message": "Employee cache invalidated", "code": 200}), 200
+
+        def employee_cache_stats():
+            return jsonify({"message": "Employee cache stats", "data": self.stats(), "code": 200}), 200
+
+        app.add_url_rule('/employee_cache/invalidate', 'invalidate_employee_cache',
+                         invalidate_employee_cache, methods=['POST'])
+        app.add_url_rule('/employee_cache/stats', 'employee_cache_stats', employee_cache_stats, methods=['GET'])
+
+
+# shared instance used by every service in this process
+employee_directory = EmployeeDirectory()
@@ -0,0 +1,158 @@
+import pytest
+import requests
+from datetime import date
+from unittest import mock
+from ..make_request import make_request as service
+from ..make_request.make_request import app, generate_recurring_dates, parse_recurring_day, stored_recurring_day
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+# 2024-10-07 is a Monday
+
+def test_generate_recurring_dates_for_several_days():
+    dates = generate_recurring_dates("2024-10-07", "2024-10-18", ["Friday", "Monday", "Wednesday"])
+    assert dates == [
+        date(2024, 10, 7), date(2024, 10, 9), date(2024, 10, 11),
+        date(2024, 10, 14), date(2024, 10, 16), date(2024, 10, 18),
+    ]
+
+def test_generate_recurring_dates_every_two_weeks_from_a_mid_week_start():
+    # the week of the Wednesday start is the first week, its Monday has already passed
+    dates = generate_recurring_dates("2024-10-09", "2024-11-08", ["Monday", "Thursday"], every_n_weeks=2)
+    assert dates == [date(2024, 10, 10), date(2024, 10, 21), date(2024, 10, 24), date(2024, 11, 4), date(2024, 11, 7)]
+
+def test_generate_recurring_dates_leaves_out_excluded_dates():
+    dates = generate_recurring_dates("2024-10-07", "2024-10-31", "Thursday", exclude_dates=["2024-10-17", date(2024, 10, 31)])
+    assert dates == [date(2024, 10, 10), date(2024, 10, 24)]
+
+def test_generate_recurring_dates_rejects_start_after_end():
+    with pytest.raises(ValueError):
+        generate_recurring_dates("2024-10-18", "2024-10-07", "Monday")
+
+def test_generate_recurring_dates_reads_the_stored_form():
+    stored = stored_recurring_day(["Monday", "Wednesday", "Friday"])
+    assert stored == "Mon,Wed,Fri"
+    assert generate_recurring_dates("2024-10-07", "2024-10-11", stored) == \
+        generate_recurring_dates("2024-10-07", "2024-10-11", ["Monday", "Wednesday", "Friday"])
+
+def test_parse_recurring_day():
+    assert parse_recurring_day("Tuesday") == ["Tuesday"]
+    assert parse_recurring_day(["Thursday"]) == ["Thursday"]
+    assert stored_recurring_day(["Thursday"]) == "Thursday"
+    with pytest.raises(ValueError):
+        parse_recurring_day("Saturday")
+    with pytest.raises(ValueError):
+        parse_recurring_day([])
+
+EMPLOYEE = {"staff_fname": "Susan", "staff_lname": "Goh", "reporting_manager": 140001}
+
+def json_response(status_code, data):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = {"data": data}
+    return response
+
+@pytest.fixture
+def services():
+    """Stub the downstream microservices, blockout_service.post answers the blockout check"""
+    with mock.patch.object(service, "blockout_service") as blockout_service, \
+            mock.patch.object(service, "request_log_service") as request_log_service, \
+            mock.patch.object(service, "notification_service") as notification_service, \
+            mock.patch.object(service.employee_directory, "get_user", return_value=EMPLOYEE), \
+            mock.patch.object(service.employee_directory, "get_manager_email", return_value="derek@allinone.com"):
+        request_log_service.post.return_value = json_response(201, {"request_id": 1})
+        request_log_service.get.return_value = json_response(200, {
+            "staff_id": 140002, "manager_id": 140001, "is_recurring": True, "timeslot": "AM", "reason": ""
+        })
+        request_log_service.put.return_value = json_response(200, {"request_id": 1})
+        notification_service.post.return_value = json_response(202, None)
+        yield mock.Mock(blockout=blockout_service, request_log=request_log_service)
+
+def make_request(client):
+    return client.post('/make_request', json={
+        "staff_id": 140002, "request_date": "2024-10-01", "timeslot": "AM", "arrangement_date": "2024-10-08"
+    })
+
+def edit_request(client):
+    return client.put('/edit_request/1', json={
+        "request_date": "2024-10-01", "timeslot": "AM", "is_recurring": True,
+        "recurring_day": "Mon,Wed", "start_date": "2024-10-07", "end_date": "2024-10-18"
+    })
+
+def test_make_request_on_a_blockout_is_rejected(client, services):
+    blocked = [{"date": "2024-10-08", "title": "Company retreat"}]
+    services.blockout.post.return_value = json_response(200, {"blocked": blocked})
+
+    response = make_request(client)
+
+    assert response.status_code == 400
+    assert response.json["blocked_dates"] == blocked
+    services.request_log.post.assert_not_called()
+
+def test_make_request_clear_of_blockouts_is_created(client, services):
+    services.blockout.post.return_value = json_response(200, {"blocked": []})
+
+    response = make_request(client)
+
+    assert response.status_code == 201
+    assert services.blockout.post.call_args.kwargs["json"] == {"arrangement_dates": ["2024-10-08"], "timeslot": "AM"}
+    services.request_log.post.assert_called_once()
+
+def test_make_request_fails_closed_when_blockouts_cannot_be_checked(client, services):
+    services.blockout.post.side_effect = requests.exceptions.ConnectionError("refused")
+
+    response = make_request(client)
+
+    assert response.status_code == 503
+    services.request_log.post.assert_not_called()
+
+def test_edit_request_fails_closed_when_blockouts_cannot_be_checked(client, services):
+    services.blockout.post.return_value = json_response(500, None)
+
+    response = edit_request(client)
+
+    assert response.status_code == 503
+    services.request_log.put.assert_not_called()
+
+def test_edit_request_checks_the_generated_dates(client, services):
+    services.blockout.post.return_value = json_response(200, {"blocked": []})
+
+    response = edit_request(client)
+
+    assert response.status_code == 200
+    assert services.blockout.post.call_args.kwargs["json"]["arrangement_dates"] == \
+        ["2024-10-07", "2024-10-09", "2024-10-14", "2024-10-16"]
+
+def test_make_request_passes_the_recurrence_options_on(client, services):
+    services.blockout.post.return_value = json_response(200, {"blocked": []})
+
+    response = client.post('/make_request', json={
+        "staff_id": 140002, "request_date": "2024-10-01", "timeslot": "AM", "is_recurring": True,
+        "recurring_day": "Monday", "start_date": "2024-10-07", "end_date": "2024-11-04",
+        "every_n_weeks": 2, "exclude_dates": ["2024-10-21"]
+    })
+
+    assert response.status_code == 201
+    created = services.request_log.post.call_args.kwargs["json"]
+    assert (created["every_n_weeks"], created["exclude_dates"]) == (2, ["2024-10-21"])
+    assert created["arrangement_dates"] == ["2024-10-07", "2024-11-04"]
+
+def test_edit_request_keeps_the_stored_recurrence_options(client, services):
+    services.blockout.post.return_value = json_response(200, {"blocked": []})
+    services.request_log.get.return_value = json_response(200, {
+        "staff_id": 140002, "manager_id": 140001, "is_recurring": True, "timeslot": "AM", "reason": "",
+        "every_n_weeks": 2, "exclude_dates": ["2024-10-21"]
+    })
+
+    response = client.put('/edit_request/1', json={
+        "request_date": "2024-10-01", "timeslot": "AM", "is_recurring": True,
+        "recurring_day": "Monday", "start_date": "2024-10-07", "end_date": "2024-11-18"
+    })
+
+    assert response.status_code == 200
+    edited = services.request_log.put.call_args.kwargs["json"]
+    assert (edited["every_n_weeks"], edited["exclude_dates"]) == (2, ["2024-10-21"])
+    assert edited["arrangement_dates"] == ["2024-10-07", "2024-11-04", "2024-11-18"]
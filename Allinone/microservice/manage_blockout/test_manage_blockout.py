@@ -0,0 +1,110 @@
+import pytest
+from datetime import date
+from unittest import mock
+from ..manage_blockout import manage_blockout as service
+from ..manage_blockout.manage_blockout import app, db, Arrangement, Employee, \
+    find_clashing_arrangements, group_withdrawals, split_withdrawn_requests
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            sample_data()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+def sample_data():
+    """Two teams, and arrangements on both sides of a 2024-10-08 to 2024-10-10 blockout"""
+    for staff_id, manager_id in [(140001, 140001), (140002, 140001), (140003, 140001), (150002, 150001)]:
+        db.session.add(Employee(staff_id=staff_id, staff_fname="Staff", staff_lname=str(staff_id), dept="Sales",
+                                position="Account Manager", country="Singapore",
+                                email=f"{staff_id}@allinone.com", reporting_manager=manager_id, role=2))
+    for request_id, arrangement_id, staff_id, arrangement_date, timeslot in [
+        (1, 1, 140002, date(2024, 10, 8), "AM"),
+        (1, 2, 140002, date(2024, 10, 9), "FULL"),
+        (2, 1, 140003, date(2024, 10, 9), "PM"),
+        (2, 2, 140003, date(2024, 10, 15), "PM"),
+        (3, 1, 150002, date(2024, 10, 10), "AM"),
+        (4, 1, 140003, date(2024, 10, 11), "AM"),
+    ]:
+        db.session.add(Arrangement(request_id=request_id, arrangement_id=arrangement_id, staff_id=staff_id,
+                                   arrangement_date=arrangement_date, timeslot=timeslot, reason=""))
+    db.session.commit()
+
+def keys(arrangements):
+    return [(arrangement.request_id, arrangement.arrangement_id) for arrangement in arrangements]
+
+def test_find_clashing_arrangements(client):
+    start_date, end_date = date(2024, 10, 8), date(2024, 10, 10)
+
+    assert sorted(keys(find_clashing_arrangements(start_date, end_date, "FULL"))) == [(1, 1), (1, 2), (2, 1), (3, 1)]
+    # a PM blockout leaves morning arrangements alone but still clashes with full days
+    assert sorted(keys(find_clashing_arrangements(start_date, end_date, "PM"))) == [(1, 2), (2, 1)]
+    assert sorted(keys(find_clashing_arrangements(start_date, end_date, "AM", manager_id=150001))) == [(3, 1)]
+
+def test_group_withdrawals(client):
+    arrangements = find_clashing_arrangements(date(2024, 10, 8), date(2024, 10, 10), "FULL", manager_id=140001)
+
+    assert group_withdrawals(arrangements) == [
+        {"staff_email": "140002@allinone.com", "arrangements": [
+            {"request_id": 1, "arrangement_date": "2024-10-08", "timeslot": "AM"},
+            {"request_id": 1, "arrangement_date": "2024-10-09", "timeslot": "FULL"},
+        ]},
+        {"staff_email": "140003@allinone.com", "arrangements": [
+            {"request_id": 2, "arrangement_date": "2024-10-09", "timeslot": "PM"},
+        ]},
+    ]
+
+def test_split_withdrawn_requests(client):
+    arrangements = find_clashing_arrangements(date(2024, 10, 8), date(2024, 10, 10), "FULL")
+
+    # request 2 keeps its 2024-10-15 arrangement
+    assert split_withdrawn_requests(arrangements) == ([1, 3], [2])
+
+def json_response(status_code, data=None):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = {"data": data}
+    return response
+
+def manage_blockout(client, delete_status=200, update_status=200):
+    """Create a company-wide 2024-10-08 to 2024-10-10 blockout with the other microservices stubbed"""
+    with mock.patch.object(service, "blockout_service") as blockout_service, \
+            mock.patch.object(service, "arrangement_service") as arrangement_service, \
+            mock.patch.object(service, "request_log_service") as request_log_service, \
+            mock.patch.object(service, "notification_service") as notification_service:
+        blockout_service.post.return_value = json_response(201, {"blockout_id": 1})
+        arrangement_service.delete.return_value = json_response(delete_status)
+        request_log_service.put.return_value = json_response(update_status)
+        notification_service.post.return_value = json_response(202)
+        response = client.post('/manage_blockout', json={
+            "start_date": "2024-10-08", "end_date": "2024-10-10", "timeslot": {"anchorKey": "FULL"},
+            "title": "Company retreat", "blockout_description": ""
+        })
+    return response, request_log_service.put
+
+def test_manage_blockout_only_withdraws_requests_without_arrangements_left(client):
+    response, update = manage_blockout(client)
+
+    assert response.status_code == 200
+    assert update.call_args.kwargs["json"] == {"request_ids": [1, 3], "status": "Withdrawn"}
+    assert response.json["data"]["partially_withdrawn_requests"] == [2]
+
+def test_manage_blockout_reports_a_failed_withdrawal(client):
+    response, update = manage_blockout(client, delete_status=500)
+
+    assert response.status_code == 500
+    assert response.json["data"]["blockout"] == {"blockout_id": 1}
+    assert sorted(response.json["data"]["arrangements"]) == [[1, 1], [1, 2], [2, 1], [3, 1]]
+    update.assert_not_called()
+
+def test_manage_blockout_reports_a_failed_status_update(client):
+    response, _ = manage_blockout(client, update_status=500)
+
+    assert response.status_code == 500
+    assert response.json["data"]["request_ids"] == [1, 3]
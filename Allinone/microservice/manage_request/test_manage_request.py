@@ -0,0 +1,195 @@
+import pytest
+import requests
+from datetime import date, datetime, timezone
+from dateutil.relativedelta import relativedelta
+from unittest import mock
+from ..manage_request import manage_request as service
+from ..manage_request.manage_request import app, db, Arrangement, Employee, Request, Job_State, \
+    auto_reject_pending_requests, AUTO_REJECT_AFTER_MONTHS, AUTO_REJECT_JOB, AUTO_REJECT_REMARK
+from ..arrangement.arrangement import withdraw_arrangements_bulk
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+TEAM = [140002, 140003, 140004, 140005]
+
+def sample_team():
+    """Manager 140001 with a team of four"""
+    with app.app_context():
+        db.session.add(Employee(staff_id=140001, staff_fname="Derek", staff_lname="Tan", dept="Sales", position="Director",
+                                country="Singapore", email="derek@allinone.com", reporting_manager=140001, role=1))
+        for staff_id in TEAM:
+            db.session.add(Employee(staff_id=staff_id, staff_fname="Staff", staff_lname=str(staff_id), dept="Sales",
+                                    position="Account Manager", country="Singapore",
+                                    email=f"{staff_id}@allinone.com", reporting_manager=140001, role=2))
+        db.session.commit()
+
+def sample_arrangement_on(arrangement_date, request_id, staff_id, timeslot):
+    """Create an arrangement directly, the way seed data is written, without touching Team_WFH_Occupancy"""
+    with app.app_context():
+        db.session.add(Arrangement(request_id=request_id, arrangement_id=1, staff_id=staff_id,
+                                   arrangement_date=arrangement_date, timeslot=timeslot, reason=""))
+        db.session.commit()
+
+def json_response(status_code, data):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = {"data": data}
+    return response
+
+def approve(client, staff_id, arrangement_dates, timeslot):
+    """Approve a request through /manage_request with the request log and employee services stubbed"""
+    pending = {"staff_id": staff_id, "arrangement_dates": arrangement_dates, "timeslot": timeslot, "reason": ""}
+    employee = {"email": f"{staff_id}@allinone.com", "dept": "Sales", "reporting_manager": 140001}
+    team = [{"staff_id": member} for member in TEAM]
+    with mock.patch.object(service, "request_log_service") as request_log_service, \
+            mock.patch.object(service, "employee_service") as employee_service, \
+            mock.patch.object(service, "arrangement_service") as arrangement_service, \
+            mock.patch.object(service.employee_directory, "get_user", return_value=employee), \
+            mock.patch.object(service, "update_status"), mock.patch.object(service, "notify_staff"):
+        request_log_service.get.return_value = json_response(200, pending)
+        employee_service.get.return_value = json_response(200, team)
+        arrangement_service.post.return_value = json_response(201, None)
+        response = client.put('/manage_request', json={"request_id": 99, "status": "Approved"})
+    return response, arrangement_service.post
+
+def test_threshold_after_withdrawing_an_uncounted_arrangement(client):
+    sample_team()
+    for request_id, staff_id in enumerate(TEAM[:3], start=1):
+        sample_arrangement_on(date(2024, 10, 8), request_id, staff_id, "AM")
+
+    with app.app_context():
+        withdraw_arrangements_bulk([(3, 1)])
+
+    # two of four already WFH in the morning, a third would exceed 50%
+    response, create = approve(client, 140005, ["2024-10-08"], "AM")
+    assert response.status_code == 403
+    assert response.json["failed_dates"] == [{"date": "2024-10-08", "reason": "Exceeds 50% threshold for AM shift"}]
+    create.assert_not_called()
+
+def auto_reject_cutoff():
+    return datetime.now(tz=timezone.utc).date() - relativedelta(months=AUTO_REJECT_AFTER_MONTHS)
+
+def sample_request(request_date, staff_id=140002, status="Pending"):
+    """Create a single date request made on request_date, returns its request_id"""
+    with app.app_context():
+        entry = Request(staff_id=staff_id, manager_id=140001, request_date=request_date, arrangement_date=request_date,
+                        timeslot="AM", reason="", remark="", is_recurring=False, recurring_day=None,
+                        start_date=None, end_date=None, status=status)
+        db.session.add(entry)
+        db.session.commit()
+        return entry.request_id
+
+def request_statuses():
+    with app.app_context():
+        return {entry.request_id: (entry.status, entry.remark) for entry in Request.query.all()}
+
+def high_water_mark():
+    with app.app_context():
+        job_state = db.session.get(Job_State, AUTO_REJECT_JOB)
+        return job_state.high_water_mark if job_state else None
+
+def run_auto_reject(notify_status=202, staff=None):
+    """Run the auto-rejection job with the employee and notification services stubbed"""
+    if staff is None:
+        staff = {str(staff_id): {"email": f"{staff_id}@allinone.com"} for staff_id in TEAM}
+    with mock.patch.object(service, "notification_service") as notification_service, \
+            mock.patch.object(service.employee_directory, "get_users", return_value=staff):
+        notification_service.post.return_value = mock.Mock(status_code=notify_status)
+        with app.app_context():
+            rejected = auto_reject_pending_requests()
+    return rejected, notification_service.post
+
+def test_auto_reject_rejects_overdue_requests_in_bulk(client):
+    cutoff = auto_reject_cutoff()
+    overdue = [sample_request(cutoff - relativedelta(days=1), staff_id=140002), sample_request(cutoff, staff_id=140003)]
+    recent = sample_request(cutoff + relativedelta(days=1))
+    approved = sample_request(cutoff - relativedelta(days=1), status="Approved")
+
+    rejected, notify = run_auto_reject()
+
+    assert sorted(rejected) == [(overdue[0], 140002), (overdue[1], 140003)]
+    statuses = request_statuses()
+    assert [statuses[request_id] for request_id in overdue] == [("Rejected", AUTO_REJECT_REMARK)] * 2
+    assert statuses[recent][0] == "Pending"
+    assert statuses[approved][0] == "Approved"
+    notifications = notify.call_args.kwargs["json"]["notifications"]
+    assert sorted(notification["request_id"] for notification in notifications) == sorted(overdue)
+    assert high_water_mark() == cutoff
+
+def test_auto_reject_skips_requests_below_the_high_water_mark(client):
+    cutoff = auto_reject_cutoff()
+    sample_request(cutoff)
+    run_auto_reject()
+
+    # backdated below the mark after the first run, the next run does not scan that far back
+    backdated = sample_request(cutoff - relativedelta(days=7))
+    rejected, notify = run_auto_reject()
+
+    assert rejected == []
+    notify.assert_not_called()
+    assert request_statuses()[backdated][0] == "Pending"
+
+def test_auto_reject_notifies_again_when_notify_fails(client):
+    cutoff = auto_reject_cutoff()
+    overdue = sample_request(cutoff)
+
+    rejected, notify = run_auto_reject(notify_status=500)
+
+    assert rejected == []
+    notify.assert_called_once()
+    # the rejection is committed before notifying, the mark waits for a successful notification
+    assert request_statuses()[overdue] == ("Rejected", AUTO_REJECT_REMARK)
+    assert high_water_mark() is None
+
+    rejected, notify = run_auto_reject()
+    assert rejected == [(overdue, 140002)]
+    assert [notification["request_id"] for notification in notify.call_args.kwargs["json"]["notifications"]] == [overdue]
+    assert high_water_mark() == cutoff
+
+def test_auto_reject_holds_the_mark_when_staff_lookup_fails(client):
+    overdue = sample_request(auto_reject_cutoff())
+
+    with mock.patch.object(service, "notification_service") as notification_service, \
+            mock.patch.object(service.employee_directory.client, "post",
+                              side_effect=requests.exceptions.ConnectionError("refused")):
+        with app.app_context():
+            rejected = auto_reject_pending_requests()
+
+    assert rejected == []
+    notification_service.post.assert_not_called()
+    assert high_water_mark() is None
+
+    rejected, _ = run_auto_reject()
+    assert rejected == [(overdue, 140002)]
+
+def test_count_wfh_by_date_over_a_range(client):
+    sample_team()
+    sample_arrangement_on(date(2024, 10, 7), 1, 140002, "AM")
+    sample_arrangement_on(date(2024, 10, 7), 2, 140003, "PM")
+    sample_arrangement_on(date(2024, 10, 7), 3, 140004, "FULL")
+    sample_arrangement_on(date(2024, 10, 8), 4, 140002, "FULL")
+    sample_arrangement_on(date(2024, 10, 8), 5, 140005, "AM")
+    dates = ["2024-10-07", "2024-10-08", "2024-10-09"]
+
+    with app.app_context():
+        am_counts, pm_counts = service.count_wfh_by_date(140001, dates)
+        assert am_counts == {"2024-10-07": 2, "2024-10-08": 2}
+        assert pm_counts == {"2024-10-07": 2, "2024-10-08": 1}
+
+        # 2024-10-08 is now read from its occupancy row, the other dates still from the arrangements
+        withdraw_arrangements_bulk([(5, 1)])
+        assert service.count_wfh_by_date(140001, dates) == ({"2024-10-07": 2, "2024-10-08": 1},
+                                                           {"2024-10-07": 2, "2024-10-08": 1})
+
+        assert service.past_wfh_dates(140002, dates) == {"2024-10-07", "2024-10-08"}
+        assert service.past_wfh_dates(140005, dates) == set()
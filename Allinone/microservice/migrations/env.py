@@ -0,0 +1,38 @@
+from logging.config import fileConfig
+from os import environ
+
+from alembic import context
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+load_dotenv()
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+DATABASE_URI = environ.get("dbURL") or "mysql+mysqlconnector://root@localhost:3306/spm_db"
+
+# spm_db.sql and the models differ in table name case (Request_Log vs Request_log), so migrations are written
+# by hand instead of autogenerated from models.db.metadata
+target_metadata = None
+
+
+def run_migrations_offline():
+    context.configure(url=DATABASE_URI, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(DATABASE_URI)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
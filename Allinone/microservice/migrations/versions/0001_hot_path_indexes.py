@@ -0,0 +1,62 @@
+"""Add indexes for the hot query paths
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns) - the names match the ORM models and spm_db.sql
+INDEXES = [
+    ('Request_Log', 'ix_request_log_manager_status', ['manager_id', 'status']),
+    ('Request_Log', 'ix_request_log_status_request_date', ['status', 'request_date']),
+    ('RequestDates', 'ix_requestdates_request_id', ['request_id']),
+    ('Employee', 'ix_employee_reporting_manager', ['reporting_manager']),
+    ('Employee', 'ix_employee_email', ['email']),
+    ('Block_Out_Dates', 'ix_block_out_dates_start_end', ['start_date', 'end_date']),
+]
+
+
+# Databases created from an older spm_db.sql differ in table name case (Request_Log vs Request_log)
+def resolve_table(inspector, table):
+    for name in inspector.get_table_names():
+        if name.lower() == table.lower():
+            return name
+    return table
+
+# Databases created from the current spm_db.sql already have these indexes
+def has_index(inspector, table, name):
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    if context.is_offline_mode():
+        for table, name, columns in INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        table = resolve_table(inspector, table)
+        if not has_index(inspector, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    if context.is_offline_mode():
+        for table, name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        return
+
+    inspector = sa.inspect(op.get_bind())
+    for table, name, _ in reversed(INDEXES):
+        table = resolve_table(inspector, table)
+        if has_index(inspector, table, name):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""Add the Job_State table for the scheduled jobs' high-water marks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# Databases created from the current spm_db.sql already have the table
+def has_job_state(bind):
+    return 'job_state' in {name.lower() for name in sa.inspect(bind).get_table_names()}
+
+
+def upgrade():
+    if not context.is_offline_mode() and has_job_state(op.get_bind()):
+        return
+
+    op.create_table(
+        'Job_State',
+        sa.Column('job_name', sa.String(64), primary_key=True),
+        sa.Column('high_water_mark', sa.Date, nullable=True),
+        sa.Column('last_run_at', sa.DateTime, nullable=True),
+    )
+
+
+def downgrade():
+    if not context.is_offline_mode() and not has_job_state(op.get_bind()):
+        return
+
+    op.drop_table('Job_State')
@@ -0,0 +1,29 @@
+"""Index arrangements by date for the range aggregations
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+# Databases created from the current spm_db.sql already have the index
+def has_index(bind):
+    return any(index['name'] == 'ix_arrangement_date' for index in sa.inspect(bind).get_indexes('Arrangement'))
+
+
+def upgrade():
+    if context.is_offline_mode() or not has_index(op.get_bind()):
+        op.create_index('ix_arrangement_date', 'Arrangement', ['arrangement_date'])
+
+
+def downgrade():
+    if context.is_offline_mode() or has_index(op.get_bind()):
+        op.drop_index('ix_arrangement_date', table_name='Arrangement')
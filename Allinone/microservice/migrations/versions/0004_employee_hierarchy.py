@@ -0,0 +1,40 @@
+"""Add the Employee_Hierarchy closure table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+# Databases created from the current spm_db.sql already have the table
+def has_employee_hierarchy(bind):
+    return 'employee_hierarchy' in {name.lower() for name in sa.inspect(bind).get_table_names()}
+
+
+def upgrade():
+    if not context.is_offline_mode() and has_employee_hierarchy(op.get_bind()):
+        return
+
+    # filled by `flask rebuild-hierarchy` in the employee service
+    op.create_table(
+        'Employee_Hierarchy',
+        sa.Column('ancestor_id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('descendant_id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('depth', sa.Integer, nullable=False),
+    )
+    op.create_index('ix_employee_hierarchy_descendant_depth', 'Employee_Hierarchy', ['descendant_id', 'depth'])
+
+
+def downgrade():
+    if not context.is_offline_mode() and not has_employee_hierarchy(op.get_bind()):
+        return
+
+    op.drop_table('Employee_Hierarchy')
@@ -0,0 +1,63 @@
+"""Make Employee.reporting_manager an indexed NOT NULL INT foreign key
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+FOREIGN_KEY = 'fk_employee_reporting_manager'
+
+
+# Databases created from an older spm_db.sql differ in name case (Reporting_Manager vs reporting_manager)
+def find_column(inspector, table, column):
+    for found in inspector.get_columns(table):
+        if found['name'].lower() == column:
+            return found
+    raise LookupError(f"{table}.{column} does not exist")
+
+def resolve_table(inspector, table):
+    for name in inspector.get_table_names():
+        if name.lower() == table.lower():
+            return name
+    return table
+
+
+def upgrade():
+    if context.is_offline_mode():
+        op.alter_column('Employee', 'Reporting_Manager', type_=sa.Integer(), nullable=False, existing_nullable=True)
+        op.create_foreign_key(FOREIGN_KEY, 'Employee', 'Employee', ['Reporting_Manager'], ['Staff_ID'])
+        return
+
+    inspector = sa.inspect(op.get_bind())
+    table = resolve_table(inspector, 'Employee')
+    reporting_manager = find_column(inspector, table, 'reporting_manager')
+    staff_id = find_column(inspector, table, 'staff_id')
+
+    # a VARCHAR column compared with integer ids is cast row by row and cannot use ix_employee_reporting_manager.
+    # Every employee has a manager, the top of the org reports to itself, so the column is NOT NULL like the model.
+    if not isinstance(reporting_manager['type'], sa.Integer) or reporting_manager['nullable']:
+        op.alter_column(table, reporting_manager['name'], type_=sa.Integer(), nullable=False,
+                        existing_type=reporting_manager['type'], existing_nullable=reporting_manager['nullable'])
+
+    if not any(foreign_key['name'] == FOREIGN_KEY for foreign_key in inspector.get_foreign_keys(table)):
+        op.create_foreign_key(FOREIGN_KEY, table, table, [reporting_manager['name']], [staff_id['name']])
+
+
+# The column stays a NOT NULL INT: it only ever held staff ids, and VARCHAR was the bug being fixed
+def downgrade():
+    if context.is_offline_mode():
+        op.drop_constraint(FOREIGN_KEY, 'Employee', type_='foreignkey')
+        return
+
+    inspector = sa.inspect(op.get_bind())
+    table = resolve_table(inspector, 'Employee')
+    if any(foreign_key['name'] == FOREIGN_KEY for foreign_key in inspector.get_foreign_keys(table)):
+        op.drop_constraint(FOREIGN_KEY, table, type_='foreignkey')
@@ -0,0 +1,75 @@
+"""Add the Team_WFH_Occupancy and Revoke_Task_Step tables
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Count the existing arrangements into the new table, same result as `flask rebuild-occupancy`
+BACKFILL_OCCUPANCY = """
+INSERT INTO Team_WFH_Occupancy (manager_id, occupancy_date, am_count, pm_count, team_size)
+SELECT e.Reporting_Manager, a.arrangement_date,
+    SUM(CASE WHEN a.timeslot IN ('AM', 'FULL') THEN 1 ELSE 0 END),
+    SUM(CASE WHEN a.timeslot IN ('PM', 'FULL') THEN 1 ELSE 0 END),
+    (SELECT COUNT(*) FROM {employee} team WHERE team.Reporting_Manager = e.Reporting_Manager)
+FROM {arrangement} a
+JOIN {employee} e ON e.Staff_ID = a.staff_id
+GROUP BY e.Reporting_Manager, a.arrangement_date
+"""
+
+
+# Databases created from the current spm_db.sql already have the tables
+def table_names(bind):
+    return {name.lower() for name in sa.inspect(bind).get_table_names()}
+
+def resolve_table(bind, table):
+    for name in sa.inspect(bind).get_table_names():
+        if name.lower() == table.lower():
+            return name
+    return table
+
+
+def upgrade():
+    existing = set() if context.is_offline_mode() else table_names(op.get_bind())
+
+    if 'team_wfh_occupancy' not in existing:
+        op.create_table(
+            'Team_WFH_Occupancy',
+            sa.Column('manager_id', sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column('occupancy_date', sa.Date, primary_key=True),
+            sa.Column('am_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('pm_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('team_size', sa.Integer, nullable=False, server_default='0'),
+        )
+        if context.is_offline_mode():
+            op.execute(BACKFILL_OCCUPANCY.format(employee='Employee', arrangement='Arrangement'))
+        else:
+            bind = op.get_bind()
+            op.execute(BACKFILL_OCCUPANCY.format(
+                employee=resolve_table(bind, 'Employee'), arrangement=resolve_table(bind, 'Arrangement')
+            ))
+
+    if 'revoke_task_step' not in existing:
+        op.create_table(
+            'Revoke_Task_Step',
+            sa.Column('task_id', sa.String(64), primary_key=True),
+            sa.Column('step', sa.String(32), primary_key=True),
+            sa.Column('completed_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+        )
+
+
+def downgrade():
+    existing = None if context.is_offline_mode() else table_names(op.get_bind())
+
+    if existing is None or 'revoke_task_step' in existing:
+        op.drop_table('Revoke_Task_Step')
+    if existing is None or 'team_wfh_occupancy' in existing:
+        op.drop_table('Team_WFH_Occupancy')
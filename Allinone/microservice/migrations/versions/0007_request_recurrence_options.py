@@ -0,0 +1,55 @@
+"""Store the every_n_weeks and exclude_dates recurrence options on Request_Log
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+# Databases created from an older spm_db.sql differ in table name case (Request_Log vs Request_log)
+def resolve_table(inspector, table):
+    for name in inspector.get_table_names():
+        if name.lower() == table.lower():
+            return name
+    return table
+
+# Databases created from the current spm_db.sql already have the columns
+def column_names(inspector, table):
+    return {column['name'].lower() for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    if context.is_offline_mode():
+        table, existing = 'Request_Log', set()
+    else:
+        inspector = sa.inspect(op.get_bind())
+        table = resolve_table(inspector, 'Request_Log')
+        existing = column_names(inspector, table)
+
+    # requests made before the options existed recur every week and exclude nothing
+    if 'every_n_weeks' not in existing:
+        op.add_column(table, sa.Column('every_n_weeks', sa.Integer, nullable=False, server_default='1'))
+    if 'exclude_dates' not in existing:
+        op.add_column(table, sa.Column('exclude_dates', sa.Text, nullable=True))
+
+
+def downgrade():
+    if context.is_offline_mode():
+        table, existing = 'Request_Log', {'every_n_weeks', 'exclude_dates'}
+    else:
+        inspector = sa.inspect(op.get_bind())
+        table = resolve_table(inspector, 'Request_Log')
+        existing = column_names(inspector, table)
+
+    if 'exclude_dates' in existing:
+        op.drop_column(table, 'exclude_dates')
+    if 'every_n_weeks' in existing:
+        op.drop_column(table, 'every_n_weeks')
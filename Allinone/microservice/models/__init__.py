@@ -0,0 +1,10 @@
+"""
+ORM models shared by every microservice, all mapped on one SQLAlchemy instance.
+Services import the models from here instead of from each other, and build their app with create_app.
+"""
+from .database import db, create_app, DATABASE_URI, MAC_DATABASE_URI, DOCKER_HOST_DATABASE_URI
+from .employee import Employee, Employee_Hierarchy
+from .requests_log import Request, RequestDates
+from .arrangement import Arrangement, Team_WFH_Occupancy
+from .blockout import BlockoutDates
+from .jobs import Job_State, Revoke_Task_Step
@@ -0,0 +1,54 @@
+from .database import db
+
+
+# Arrangement model
+class Arrangement(db.Model):
+    __tablename__ = 'Arrangement'
+    __table_args__ = (
+        db.UniqueConstraint('staff_id', 'arrangement_date', 'timeslot', name='unique_arrangement_constraint'),
+        db.Index('ix_arrangement_date', 'arrangement_date'),
+    )
+
+    request_id = db.Column(db.Integer, primary_key=True)
+    arrangement_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    staff_id = db.Column(db.Integer, nullable=False)
+    arrangement_date = db.Column(db.Date, nullable=False)
+    timeslot = db.Column(db.String(50), nullable=False) 
+    reason = db.Column(db.String(255), nullable=False)
+
+    def __init__(self, request_id, arrangement_id, staff_id, arrangement_date, timeslot, reason):
+        self.request_id = request_id
+        self.arrangement_id = arrangement_id
+        self.staff_id = staff_id
+        self.arrangement_date = arrangement_date
+        self.timeslot = timeslot
+        self.reason = reason
+
+    def json(self):
+        return {
+            "request_id": self.request_id,
+            "arrangement_id": self.arrangement_id,
+            "staff_id": self.staff_id,
+            "arrangement_date": str(self.arrangement_date),
+            "timeslot": self.timeslot,
+            "reason": self.reason
+        }
+    
+# Team WFH occupancy, one row per (manager, date) kept in step with the Arrangement table
+class Team_WFH_Occupancy(db.Model):
+    __tablename__ = 'Team_WFH_Occupancy'
+
+    manager_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    occupancy_date = db.Column(db.Date, primary_key=True)
+    am_count = db.Column(db.Integer, nullable=False, default=0)
+    pm_count = db.Column(db.Integer, nullable=False, default=0)
+    team_size = db.Column(db.Integer, nullable=False, default=0)
+
+    def json(self):
+        return {
+            "manager_id": self.manager_id,
+            "occupancy_date": str(self.occupancy_date),
+            "am_count": self.am_count,
+            "pm_count": self.pm_count,
+            "team_size": self.team_size
+        }
@@ -0,0 +1,25 @@
+from .database import db
+
+
+class BlockoutDates(db.Model):
+    __tablename__ = 'Block_Out_Dates'
+    __table_args__ = (
+        db.Index('ix_block_out_dates_start_end', 'start_date', 'end_date'),
+    )
+
+    blockout_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    timeslot = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    blockout_description = db.Column(db.String(255), nullable=False)
+
+    def json(self):
+        return {
+            'blockout_id': self.blockout_id,
+            'start_date': str(self.start_date),
+            'end_date': str(self.end_date),
+            'title': self.title,
+            'timeslot': self.timeslot,
+            'blockout_description': self.blockout_description
+    }
@@ -0,0 +1,83 @@
+from sqlalchemy import ForeignKey
+
+from .database import db
+
+
+class Employee(db.Model):
+    __tablename__ = 'Employee'
+    __table_args__ = (
+        db.Index('ix_employee_reporting_manager', 'reporting_manager'),
+        db.Index('ix_employee_email', 'email'),
+    )
+
+    staff_id = db.Column(db.Integer, primary_key = True, nullable=False)
+    staff_fname = db.Column(db.String(50), nullable=False)
+    staff_lname = db.Column(db.String(50), nullable=False)
+    dept = db.Column(db.String(50), nullable=False)
+    position = db.Column(db.String(50), nullable=False)
+    country = db.Column(db.String(50), nullable=False)
+    email = db.Column(db.String(50), nullable=False)
+    reporting_manager = db.Column(db.Integer, ForeignKey('Employee.staff_id', name='fk_employee_reporting_manager'), nullable=False)
+    role = db.Column(db.Integer, nullable=False)
+
+    # Method to convert the Employee object to a dictionary
+    def to_dict(self):
+        return {
+            'staff_id': self.staff_id,
+            'staff_fname': self.staff_fname,
+            'staff_lname': self.staff_lname,
+            'dept': self.dept,
+            'position': self.position,
+            'country': self.country,
+            'email': self.email,
+            'reporting_manager': self.reporting_manager,
+            'role': self.role
+        }
+
+
+    def __init__(self, staff_id: int, staff_fname: str, staff_lname: str, dept: str, position: str, country: str, email: str, reporting_manager: int, role: int) -> None:
+        super().__init__()
+        self.staff_id = staff_id
+        self.staff_fname = staff_fname
+        self.staff_lname = staff_lname
+        self.dept = dept
+        self.position = position
+        self.country = country
+        self.email = email
+        self.reporting_manager = reporting_manager
+        self.role = role
+
+    def json(self):
+        output = {
+            'staff_id': self.staff_id,
+            'staff_fname': self.staff_fname,
+            'staff_lname': self.staff_lname,
+            'staff_dept': self.dept,
+            'position': self.position,
+            'country': self.country,
+            'email': self.email,
+            'reporting_manager': self.reporting_manager,
+            'role_num': self.role
+        }
+
+        # checking role
+        if self.role == 1:
+            output['role'] = 'HR'
+        elif self.role == 2:
+            output['role'] = 'Staff'
+        else:
+            output['role'] = 'Manager'
+        
+        return output
+
+# Closure table of the reporting lines: one row per (manager, employee somewhere under them), plus a depth 0 row
+# per employee for itself, so a whole subtree is one indexed join instead of a recursion over HTTP
+class Employee_Hierarchy(db.Model):
+    __tablename__ = 'Employee_Hierarchy'
+    __table_args__ = (
+        db.Index('ix_employee_hierarchy_descendant_depth', 'descendant_id', 'depth'),
+    )
+
+    ancestor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    descendant_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    depth = db.Column(db.Integer, nullable=False)
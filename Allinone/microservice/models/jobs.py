@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from .database import db
+
+
+# Progress of the scheduled jobs, so every run only looks at rows it has not seen yet
+class Job_State(db.Model):
+    __tablename__ = 'Job_State'
+
+    job_name = db.Column(db.String(64), primary_key=True)
+    high_water_mark = db.Column(db.Date, nullable=True)
+    last_run_at = db.Column(db.DateTime, nullable=True)
+
+# Steps of a revoke task that already succeeded, keyed by the task's idempotency key
+class Revoke_Task_Step(db.Model):
+    __tablename__ = 'Revoke_Task_Step'
+
+    task_id = db.Column(db.String(64), primary_key=True)
+    step = db.Column(db.String(32), primary_key=True)
+    completed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
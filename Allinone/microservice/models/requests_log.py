@@ -0,0 +1,86 @@
+from sqlalchemy import Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+
+from .database import db
+
+
+class Request(db.Model):
+    __tablename__ = 'Request_log'
+    __table_args__ = (
+        db.Index('ix_request_log_manager_status', 'manager_id', 'status'),
+        db.Index('ix_request_log_status_request_date', 'status', 'request_date'),
+    )
+
+    request_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    staff_id = db.Column(db.Integer, ForeignKey('Employee.staff_id'), nullable=False)
+    manager_id = db.Column(db.Integer, nullable=False)
+    request_date = db.Column(db.Date, nullable=False)
+    arrangement_date = db.Column(db.Date, nullable=True)
+    timeslot = db.Column(db.String(50), nullable=False)  # Morning - 1, Afternoon - 2, Full Day - 3
+    status = db.Column(db.String(20), nullable=False, default='Pending')  # Pending, Approved, Rejected
+    reason = db.Column(db.String(255), nullable=False, default="") # Reason for WFH request
+    remark = db.Column(db.String(255), nullable=False, default="") # remarks for when manager approve/reject request
+    recurring_day = db.Column(db.String(20), nullable=True) 
+    start_date = db.Column(db.Date, nullable=True)
+    end_date = db.Column(db.Date, nullable=True)
+    is_recurring = db.Column(Boolean, nullable=False, default=False)
+    # recurrence options of a recurring request, so it can be expanded again the same way when edited
+    every_n_weeks = db.Column(db.Integer, nullable=False, default=1)
+    exclude_dates = db.Column(db.Text, nullable=True)  # "YYYY-MM-DD,YYYY-MM-DD"
+
+    employee = relationship("Employee", backref="requests")
+
+    def __init__(self, staff_id, manager_id, request_date, arrangement_date, timeslot, reason, remark, 
+                 is_recurring, recurring_day, start_date, end_date, status="Pending", every_n_weeks=1, exclude_dates=None):
+        self.staff_id = staff_id
+        self.manager_id = manager_id
+        self.request_date = request_date
+        self.timeslot = timeslot
+        self.reason = reason
+        self.remark = remark
+        self.is_recurring = is_recurring
+        self.status = status
+
+        if is_recurring:
+            self.recurring_day = recurring_day
+            self.start_date = start_date
+            self.end_date = end_date
+            self.every_n_weeks = every_n_weeks
+            self.exclude_dates = exclude_dates
+            self.arrangement_date = None
+        else:
+            self.arrangement_date = arrangement_date
+            self.recurring_day = None
+            self.start_date = None
+            self.end_date = None
+            self.every_n_weeks = 1
+            self.exclude_dates = None
+
+    def json(self):
+        return {
+            'request_id': self.request_id,
+            'staff_id': self.staff_id,
+            'manager_id': self.manager_id,
+            'arrangement_date': str(self.arrangement_date),
+            'request_date': str(self.request_date),
+            'timeslot': self.timeslot,
+            'reason': self.reason,
+            'remark': self.remark,
+            'status': self.status,
+            'recurring_day': self.recurring_day,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'is_recurring': self.is_recurring,
+            'every_n_weeks': self.every_n_weeks,
+            'exclude_dates': self.exclude_dates.split(",") if self.exclude_dates else []
+        }
+    
+class RequestDates(db.Model):
+    __tablename__ = 'RequestDates'
+    __table_args__ = (
+        db.Index('ix_requestdates_request_id', 'request_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    request_id = db.Column(db.Integer, ForeignKey('Request_log.request_id'), nullable=False)
+    arrangement_date = db.Column(db.Date, nullable=False)
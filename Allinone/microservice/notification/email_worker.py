@@ -0,0 +1,94 @@
+import pika
+from pika.exceptions import AMQPError
+import json
+import os
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from sib_api_v3_sdk.rest import ApiException
+
+from amqp_setup import get_amqp_connection, declare_retry_queues, retry_or_dead_letter, publisher, NOTIFICATION_QUEUE
+from notification import send_notification, EMAIL_BUILDERS
+
+load_dotenv()
+
+# emails sent at the same time, also the number of unacked messages RabbitMQ hands to this worker
+EMAIL_WORKER_CONCURRENCY = int(os.getenv("EMAIL_WORKER_CONCURRENCY", 4))
+# delay before each retry in milliseconds, the message is dead-lettered once they run out
+EMAIL_RETRY_DELAYS_MS = [int(delay) for delay in os.getenv("EMAIL_RETRY_DELAYS_MS", "5000,30000,120000").split(",")]
+
+
+# Send one queued notification, returns None on success or the error that made it fail
+def send_queued_notification(body):
+    try:
+        message = json.loads(body)
+        notification_type = message["type"]
+        if notification_type not in EMAIL_BUILDERS:
+            raise ValueError(f"Unknown notification type {notification_type}")
+        send_notification(notification_type, message["data"])
+        return None
+    except Exception as e:
+        return e
+
+# Client errors from the email provider and malformed messages will fail the same way on every attempt
+def is_permanent_failure(error):
+    if isinstance(error, ApiException):
+        return error.status is not None and 400 <= error.status < 500 and error.status != 429
+    return isinstance(error, (ValueError, KeyError, TypeError))
+
+# Runs on the connection thread: pika channels must not be used from the sender threads.
+# A failed message is acked only once its copy in a retry queue or the dead-letter queue has been committed,
+# if that fails the message is handed back to the broker instead.
+def finish_message(channel, delivery_tag, body, properties, error):
+    if error is not None:
+        retry_delays = [] if is_permanent_failure(error) else EMAIL_RETRY_DELAYS_MS
+        try:
+            target = retry_or_dead_letter(publisher, NOTIFICATION_QUEUE, body, properties, retry_delays, error)
+        except (AMQPError, OSError) as publish_error:
+            print(f"Failed to send notification and to move it to a retry queue, requeueing it: {publish_error}")
+            channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+            return
+        print(f"Failed to send notification, moved to {target}: {error}")
+    channel.basic_ack(delivery_tag=delivery_tag)
+
+def main():
+    # try at least 5 times
+    retry_count = 0
+    while retry_count < 5:
+        try:
+            # Connect to RabbitMQ
+            connection = get_amqp_connection()
+            break
+        except pika.exceptions.AMQPConnectionError:
+            print("RabbitMQ is not available. Retrying...")
+            retry_count += 1
+            time.sleep(5)
+
+    if retry_count == 5:
+        raise Exception("Failed to connect to RabbitMQ after multiple attempts.")
+
+    channel = connection.channel()
+    declare_retry_queues(channel, NOTIFICATION_QUEUE, EMAIL_RETRY_DELAYS_MS)
+    channel.basic_qos(prefetch_count=EMAIL_WORKER_CONCURRENCY)
+
+    executor = ThreadPoolExecutor(max_workers=EMAIL_WORKER_CONCURRENCY, thread_name_prefix="email-sender")
+
+    def send_and_ack(delivery_tag, body, properties):
+        error = send_queued_notification(body)
+        connection.add_callback_threadsafe(partial(finish_message, channel, delivery_tag, body, properties, error))
+
+    def on_message(ch, method, properties, body):
+        executor.submit(send_and_ack, method.delivery_tag, body, properties)
+
+    channel.basic_consume(queue=NOTIFICATION_QUEUE, on_message_callback=on_message)
+
+    print('Email worker is waiting for messages...')
+    try:
+        channel.start_consuming()
+    finally:
+        executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
+from pika.exceptions import AMQPError
+from amqp_setup import publish_to_queue, publish_batch, PublishError, NOTIFICATION_QUEUE
 
 from dotenv import load_dotenv
 load_dotenv() 
@@ -43,6 +45,163 @@ app.config["SWAGGER"] = {
 }
 swagger = Swagger(app)
 
+# Email for the reporting manager after a WFH request is created
+def build_request_sent_emails(data):
+    sender = {"name": "Allinone", "email": "no-reply@allinone.com"}
+    to = [{"email": data.get("manager_email")}]
+    subject = "New Work From Home Request Notification"
+    html_content = f"""
+    <html>
+    <body>
+        <h3>New WFH Request Submitted</h3>
+        <p>Employee {data.get("employee_name")} with ID {data.get("staff_id")} has submitted a {data.get("timeslot")} WFH request for {data.get("request_date")}.</p>
+        <p>Reason: {data.get("reason")}</p>
+    </body>
+    </html>
+    """
+    return [sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)]
+
+# Email for the staff after the manager approves/rejects the WFH request
+def build_status_update_emails(data):
+    request_status = data.get("status")
+    sender = {"name": "Allinone", "email": "no-reply@yourcompany.com"}
+    to = [{"email": data.get("staff_email")}]
+    subject = f"Your Work From Home Request Has Been {request_status}"
+    html_content = f"""
+    <html>
+    <body>
+        <h3>Your WFH Request Has Been {request_status}</h3>
+        <p>Your WFH request with request ID {data.get("request_id")} has been {request_status.lower()}.</p>
+    </body>
+    </html>
+    """
+    return [sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)]
+
+# Emails for the staff and manager after arrangements are revoked
+def build_revoke_arrangements_emails(data):
+    staff_email = data.get("staff_email")
+    sender = {"name": "Allinone", "email": "no-reply@yourcompany.com"}
+    html_content_staff = f"""
+    <html>
+    <body>
+        <h3>All your WFH arrangements have been revoked.</h3>
+        <p>
+            If you think this is a mistake, please contact your manager.
+        </p>
+    </body>
+    </html>
+    """
+
+    html_content_manager = f"""
+    <html>
+    <body>
+        <h3>All WFH Arrangements for {staff_email} have been revoked.</h3>
+        <p>
+            An email has been sent to the affected staff to inform of the revocation. 
+        </p>
+    </body>
+    </html>
+    """
+    return [
+        sib_api_v3_sdk.SendSmtpEmail(to=[{"email": staff_email}], html_content=html_content_staff,
+                                     sender=sender, subject="Work From Home Arrangements Revoked"),
+        sib_api_v3_sdk.SendSmtpEmail(to=[{"email": data.get("manager_email")}], html_content=html_content_manager,
+                                     sender=sender, subject="Work From Home Arrangements Successfuly Revoked")
+    ]
+
+# One email per staff member listing every arrangement a blockout withdrew
+def build_blockout_withdrawal_emails(data):
+    sender = {"name": "Allinone", "email": "no-reply@yourcompany.com"}
+    to = [{"email": data.get("staff_email")}]
+    subject = f"Work From Home Arrangements Withdrawn for {data.get('title')}"
+    withdrawn_list = "".join(
+        f"<li>{withdrawal.get('arrangement_date')} ({withdrawal.get('timeslot')})</li>"
+        for withdrawal in data.get("arrangements", [])
+    )
+    html_content = f"""
+    <html>
+    <body>
+        <h3>Your WFH arrangements during {data.get("title")} have been withdrawn.</h3>
+        <p>The following arrangements fall on a blockout period from {data.get("start_date")} to {data.get("end_date")}:</p>
+        <ul>{withdrawn_list}</ul>
+    </body>
+    </html>
+    """
+    return [sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)]
+
+EMAIL_BUILDERS = {
+    "request_sent": build_request_sent_emails,
+    "status_update": build_status_update_emails,
+    "revoke_arrangements": build_revoke_arrangements_emails,
+    "blockout_withdrawal": build_blockout_withdrawal_emails,
+}
+
+# Log a status update notification in the database
+def log_notification(data):
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                text("""
+                INSERT INTO notifications_log (request_id, recipient_email, status)
+                VALUES (:request_id, :recipient_email, :status)
+                """),
+                {"request_id": data.get("request_id"), 
+                "recipient_email": data.get("staff_email"), 
+                "status": data.get("status")}
+            )
+    except SQLAlchemyError as e:
+        print(f"Failed to log notification in database: {e}")
+
+# Send the emails of one notification through Brevo, raises ApiException if the provider rejects any of them
+def send_notification(notification_type, data):
+    for send_smtp_email in EMAIL_BUILDERS[notification_type](data):
+        api_response = api_instance.send_transac_email(send_smtp_email)
+        print(f"{notification_type} email sent successfully. API response:", api_response)
+
+    if notification_type == "status_update":
+        log_notification(data)
+
+# Queue a notification for the email worker and answer straight away.
+# If the broker is unreachable the emails are sent inline so they are not lost.
+def dispatch_notification(notification_type, data):
+    try:
+        publish_to_queue({"type": notification_type, "data": data}, queue=NOTIFICATION_QUEUE)
+        return jsonify({"message": "Notification queued"}), 202
+    except (AMQPError, OSError) as e:
+        print(f"Failed to queue {notification_type} notification, sending inline: {e}")
+
+    try:
+        send_notification(notification_type, data)
+    except ApiException as e:
+        print(f"Exception when sending {notification_type} email: {e}")
+        return jsonify({"error": "Failed to send email"}), 500
+    return jsonify({"message": "Notification sent successfully"}), 200
+
+# Queue many notifications of one type in a single publish round.
+# If the broker is unreachable the ones it has not committed are sent inline, the emails that failed are reported back.
+def dispatch_notification_batch(notification_type, notifications):
+    try:
+        publish_batch([{"type": notification_type, "data": data} for data in notifications], queue=NOTIFICATION_QUEUE)
+        return jsonify({"message": f"{len(notifications)} notifications queued"}), 202
+    except PublishError as e:
+        # the email worker already owns the committed ones, sending them here as well would email twice
+        queued = e.published
+        print(f"Failed to queue {notification_type} notifications, sending {len(notifications) - queued} inline: {e}")
+    except (AMQPError, OSError) as e:
+        queued = 0
+        print(f"Failed to queue {notification_type} notifications, sending inline: {e}")
+
+    failed = []
+    for data in notifications[queued:]:
+        try:
+            send_notification(notification_type, data)
+        except ApiException as e:
+            print(f"Exception when sending {notification_type} email: {e}")
+            failed.append(data["staff_email"])
+    if failed:
+        return jsonify({"error": "Failed to send email", "failed": failed}), 500
+    return jsonify({"message": f"{len(notifications)} notifications sent successfully"}), 200
+
 # Route to send email notification to the reporting manager after a WFH request is created
 @app.route("/request_sent", methods=["POST"])
 def request_sent():
@@ -50,39 +209,12 @@ def request_sent():
         # Extract request data
         data = request.json
         manager_email = data.get("manager_email")
-        staff_id = data.get("staff_id")
-        employee_name = data.get("employee_name")
-        request_date = data.get("request_date")
-        timeslot = data.get("timeslot")
-        reason = data.get("reason")
 
         if not manager_email:
             return jsonify({"error": "Manager email is missing"}), 400
         
-        # Email content to notify the manager
-        sender = {"name": "Allinone", "email": "no-reply@allinone.com"}
-        to = [{"email": manager_email}]
-        subject = "New Work From Home Request Notification"
-        html_content = f"""
-        <html>
-        <body>
-            <h3>New WFH Request Submitted</h3>
-            <p>Employee {employee_name} with ID {staff_id} has submitted a {timeslot} WFH request for {request_date}.</p>
-            <p>Reason: {reason}</p>
-        </body>
-        </html>
-        """
-
-        # Send the email
-        send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)
-        api_response = api_instance.send_transac_email(send_smtp_email)
-        print("Manager notification email sent successfully. API response:", api_response)
-
-        return jsonify({"message": "Manager email sent successfully"}), 200
+        return dispatch_notification("request_sent", data)
 
-    except ApiException as e:
-        print(f"Exception when sending manager email: {e}")
-        return jsonify({"error": "Failed to send email"}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -95,50 +227,28 @@ def notify_status_update():
         data = request.json
         staff_email = data.get("staff_email")
         request_status = data.get("status")  # Approved/Rejected
-        request_id = data.get("request_id")
 
         # Validate presence of staff_email and change in request status
         if not staff_email or not request_status:
             return jsonify({"error": "Staff email or status is missing"}), 400
         
-        # Email content to notify the staff of the request status
-        sender = {"name": "Allinone", "email": "no-reply@yourcompany.com"}
-        to = [{"email": staff_email}]
-        subject = f"Your Work From Home Request Has Been {request_status}"
-        html_content = f"""
-        <html>
-        <body>
-            <h3>Your WFH Request Has Been {request_status}</h3>
-            <p>Your WFH request with request ID {request_id} has been {request_status.lower()}.</p>
-        </body>
-        </html>
-        """
-
-        # Send the email
-        send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(to=to, html_content=html_content, sender=sender, subject=subject)
-        api_response = api_instance.send_transac_email(send_smtp_email)
-        print("Status update email sent successfully. API response:", api_response)
+        return dispatch_notification("status_update", data)
 
-        # Log the notification in the database
-        try:
-            with engine.connect() as connection:
-                connection.execute(
-                    text("""
-                    INSERT INTO notifications_log (request_id, recipient_email, status)
-                    VALUES (:request_id, :recipient_email, :status)
-                    """),
-                    {"request_id": request_id, 
-                    "recipient_email": staff_email, 
-                    "status": request_status}
-                )
-        except SQLAlchemyError as e:
-            print(f"Failed to log notification in database: {e}")
-
-        return jsonify({"message": "Status update email sent successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Route to send status update emails for many requests at once, used by the auto-rejection job
+@app.route("/notify_status_update/batch", methods=["POST"])
+def notify_status_update_batch():
+    try:
+        notifications = request.json.get("notifications")
+
+        if not isinstance(notifications, list) or any(
+                not notification.get("staff_email") or not notification.get("status") for notification in notifications):
+            return jsonify({"error": "Notifications with staff emails and statuses are missing"}), 400
+
+        return dispatch_notification_batch("status_update", notifications)
 
-    except ApiException as e:
-        print(f"Exception when sending status update email: {e}")
-        return jsonify({"error": "Failed to send email"}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -149,61 +259,40 @@ def notify_revoke_arranagements():
         data = request.json
         staff_email = data.get("staff_email")
         manager_email = data.get("manager_email")
-        request_ids = data.get("request_ids")
-        request_id_str = ""
-        # request_id_check = ""
 
         # Validate presence of staff_email and manager_email
         if not staff_email or not manager_email:
             return jsonify({"error": "Staff email or manager email is missing"}), 400
         
-        # Email content to notify the staff of the request status
-        print("Preparing email details...")
-        sender = {"name": "Allinone", "email": "no-reply@yourcompany.com"}
-        to_staff = [{"email": staff_email}]
-        to_manager = [{"email": manager_email}]
-        subject_staff = f"Work From Home Arrangements Revoked"
-        subject_manager = f"Work From Home Arrangements Successfuly Revoked"
-        html_content_staff = f"""
-        <html>
-        <body>
-            <h3>All your WFH arrangements have been revoked.</h3>
-            <p>
-                If you think this is a mistake, please contact your manager.
-            </p>
-        </body>
-        </html>
-        """
-
-        html_content_manager = f"""
-        <html>
-        <body>
-            <h3>All WFH Arrangements for {staff_email} have been revoked.</h3>
-            <p>
-                An email has been sent to the affected staff to inform of the revocation. 
-            </p>
-        </body>
-        </html>
-        """
-
-        # Send the emails
-        # Staff email
-        print("Sending staff email...")
-        send_smtp_email_staff = sib_api_v3_sdk.SendSmtpEmail(to=to_staff, html_content=html_content_staff, sender=sender, subject=subject_staff)
-        api_response_staff = api_instance.send_transac_email(send_smtp_email_staff)
-        print("Revocation email sent to staff successfully. API response:", api_response_staff)
-
-        # Manager email
-        print("Sending manager email...")
-        send_smtp_email_manager = sib_api_v3_sdk.SendSmtpEmail(to=to_manager, html_content=html_content_manager, sender=sender, subject=subject_manager)
-        api_response_manager = api_instance.send_transac_email(send_smtp_email_manager)
-        print("Revocation email sent to manager successfully. API response:", api_response_manager)
-
-        return jsonify({"message": "Revocation emais sent successfully"}), 200
+        return dispatch_notification("revoke_arrangements", data)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Route to send one email per staff member whose arrangements were withdrawn by a blockout
+@app.route("/notify_blockout_withdrawals", methods=["POST"])
+def notify_blockout_withdrawals():
+    try:
+        data = request.json
+        withdrawals = data.get("withdrawals")
+
+        if not isinstance(withdrawals, list) or any(not withdrawal.get("staff_email") for withdrawal in withdrawals):
+            return jsonify({"error": "Withdrawals with staff emails are missing"}), 400
+
+        notifications = [
+            {
+                "staff_email": withdrawal["staff_email"],
+                "arrangements": withdrawal.get("arrangements", []),
+                "title": data.get("title"),
+                "start_date": data.get("start_date"),
+                "end_date": data.get("end_date")
+            }
+            for withdrawal in withdrawals
+        ]
+
+        # one publish round for the whole blockout instead of one request per staff member
+        return dispatch_notification_batch("blockout_withdrawal", notifications)
 
-    except ApiException as e:
-        print(f"Exception when sending revocation emails: {e}")
-        return jsonify({"error": "Failed to send email"}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -2,6 +2,8 @@ import unittest
 from flask import json
 from datetime import date
 import pytest
+from unittest import mock
+from ..requests_log import requests_log as service
 from ..requests_log.requests_log import app, db, Employee, Request, RequestDates
 
 class RequestApiTestCase(unittest.TestCase):
@@ -24,11 +26,11 @@ class RequestApiTestCase(unittest.TestCase):
             staff_id=1,
             staff_fname="John",
             staff_lname="Doe",
-            department="IT",
+            dept="IT",
             position="Developer",
             country="USA",
             email="johndoe@example.com",
-            reporting_manager="Manager Name",
+            reporting_manager=2,
             role=1
         )
         db.session.add(self.employee)
@@ -90,6 +92,27 @@ class RequestApiTestCase(unittest.TestCase):
         response_data = json.loads(response.data)
         self.assertTrue(response_data['data']['is_recurring'])
         self.assertEqual(response_data['data']['recurring_day'], "Monday")
+        self.assertEqual(response_data['data']['every_n_weeks'], 1)
+        self.assertEqual(response_data['data']['exclude_dates'], [])
+
+    def test_recurrence_options_are_stored(self):
+        """Test every_n_weeks and exclude_dates are kept on the request and survive an edit that leaves them out"""
+        data = {
+            "staff_id": 1, "manager_id": 2, "request_date": "2024-10-01", "timeslot": "AM", "reason": "", "remark": "",
+            "is_recurring": True, "recurring_day": "Monday", "start_date": "2024-10-07", "end_date": "2024-11-04",
+            "every_n_weeks": 2, "exclude_dates": ["2024-10-21", "2024-10-14"],
+            "arrangement_dates": ["2024-10-07", "2024-11-04"]
+        }
+        response = self.client.post('/create_request', data=json.dumps(data), content_type='application/json')
+        request_id = json.loads(response.data)['data']['request_id']
+
+        response = self.client.put(f'/edit_request/{request_id}', data=json.dumps({"reason": "Edited"}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        stored = db.session.get(Request, request_id)
+        self.assertEqual((stored.every_n_weeks, stored.exclude_dates), (2, "2024-10-14,2024-10-21"))
+        self.assertEqual(stored.json()['exclude_dates'], ["2024-10-14", "2024-10-21"])
 
     def test_get_all_requests(self):
         """Test retrieving all requests"""
@@ -218,5 +241,112 @@ class RequestApiTestCase(unittest.TestCase):
         self.assertEqual(response_data['message'], 'Requests for manager 2 found')
         self.assertTrue(len(response_data['data']) > 0)
 
+    def create_recurring_test_requests(self):
+        """Helper method to insert recurring requests with their arrangement dates"""
+        for request_id, arrangement_dates in [(1, [date(2024, 11, 4), date(2024, 11, 11)]), (2, [date(2024, 11, 5)])]:
+            db.session.add(Request(
+                staff_id=1,
+                manager_id=2,
+                request_date=date(2024, 10, 1),
+                arrangement_date=None,
+                timeslot="AM",
+                reason="Recurring WFH",
+                remark="",
+                is_recurring=True,
+                recurring_day="Monday",
+                start_date=arrangement_dates[0],
+                end_date=arrangement_dates[-1]
+            ))
+            db.session.commit()
+            for arrangement_date in arrangement_dates:
+                db.session.add(RequestDates(request_id=request_id, arrangement_date=arrangement_date))
+        db.session.commit()
+
+    def test_get_requests_groups_arrangement_dates(self):
+        """Test arrangement dates are attached to the right request"""
+        self.create_recurring_test_requests()
+
+        response = self.client.get('/get_requests/manager/2')
+        self.assertEqual(response.status_code, 200)
+
+        response_data = json.loads(response.data)
+        dates_by_request = {req['request_id']: req['arrangement_dates'] for req in response_data['data']}
+        self.assertEqual(dates_by_request, {1: ['2024-11-04', '2024-11-11'], 2: ['2024-11-05']})
+
+    def test_get_requests_with_fields(self):
+        """Test the fields projection only returns the requested fields"""
+        self.create_recurring_test_requests()
+
+        response = self.client.get('/get_requests/staff/1?fields=request_id,status')
+        self.assertEqual(response.status_code, 200)
+
+        response_data = json.loads(response.data)
+        self.assertEqual(response_data['data'], [
+            {'request_id': 1, 'status': 'Pending'},
+            {'request_id': 2, 'status': 'Pending'}
+        ])
+
+    def test_get_all_requests_unknown_field(self):
+        """Test requesting an unknown field is rejected"""
+        response = self.client.get('/get_all_requests?fields=request_id,password')
+        self.assertEqual(response.status_code, 400)
+
+        response_data = json.loads(response.data)
+        self.assertEqual(response_data['message'], 'Unknown fields: password')
+
+    def test_get_all_requests_paginated(self):
+        """Test keyset pagination and filters of all requests"""
+        self.create_recurring_test_requests()
+
+        response = self.client.get('/get_all_requests?limit=1&status=Pending')
+        self.assertEqual(response.status_code, 200)
+        response_data = json.loads(response.data)
+        self.assertEqual([req['request_id'] for req in response_data['data']], [1])
+        self.assertEqual(response_data['next_cursor'], '1')
+
+        response = self.client.get(f"/get_all_requests?limit=1&status=Pending&after={response_data['next_cursor']}")
+        response_data = json.loads(response.data)
+        self.assertEqual([req['request_id'] for req in response_data['data']], [2])
+        self.assertIsNone(response_data['next_cursor'])
+
+        response = self.client.get('/get_all_requests?status=Approved')
+        response_data = json.loads(response.data)
+        self.assertEqual(response_data['data'], [])
+
+    def test_get_all_requests_ndjson(self):
+        """Test streaming all requests as newline-delimited JSON"""
+        self.create_recurring_test_requests()
+
+        response = self.client.get('/get_all_requests', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([(req['request_id'], req['arrangement_dates']) for req in lines],
+                         [(1, ['2024-11-04', '2024-11-11']), (2, ['2024-11-05'])])
+
+        # one request per keyset query gives the same export
+        with mock.patch.object(service, "STREAM_BATCH_SIZE", 1):
+            response = self.client.get('/get_all_requests', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual([json.loads(line) for line in response.data.decode().splitlines()], lines)
+
+    def test_update_requests_bulk(self):
+        """Test updating the status of many requests at once"""
+        self.create_recurring_test_requests()
+
+        response = self.client.put('/update_requests/bulk',
+                                   data=json.dumps({"request_ids": [1, 2, 999], "status": "Withdrawn"}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['data']['updated'], 2)
+        self.assertEqual({req.status for req in Request.query.all()}, {"Withdrawn"})
+
+    def test_update_requests_bulk_missing_status(self):
+        """Test bulk update rejects a payload without a status"""
+        response = self.client.put('/update_requests/bulk',
+                                   data=json.dumps({"request_ids": [1]}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
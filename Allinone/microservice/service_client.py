@@ -0,0 +1,162 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import jsonify
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# timeouts in seconds, a stalled downstream service should fail the call instead of hanging it
+SERVICE_CONNECT_TIMEOUT = float(os.getenv("SERVICE_CONNECT_TIMEOUT", 3.05))
+SERVICE_READ_TIMEOUT = float(os.getenv("SERVICE_READ_TIMEOUT", 10))
+SERVICE_RETRIES = int(os.getenv("SERVICE_RETRIES", 2))
+SERVICE_RETRY_BACKOFF = float(os.getenv("SERVICE_RETRY_BACKOFF", 0.3))
+SERVICE_POOL_SIZE = int(os.getenv("SERVICE_POOL_SIZE", 20))
+# threads shared by every fan_out call in this process, kept below the connection pool size
+SERVICE_FANOUT_WORKERS = int(os.getenv("SERVICE_FANOUT_WORKERS", 8))
+
+# only these verbs are retried, a retried POST could create the same record twice
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# numeric path segments are folded so /user/140001 and /user/140002 share one histogram
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram for one endpoint."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, elapsed_ms, failed=False):
+        index = next((i for i, bound in enumerate(self.buckets) if elapsed_ms <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if failed:
+            self.errors += 1
+
+    def snapshot(self):
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.buckets, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "buckets": buckets
+        }
+
+
+class ServiceClient:
+    """
+    HTTP client for one downstream service.
+    Keeps a pooled keep-alive session, applies connect/read timeouts to every call,
+    retries idempotent verbs with exponential backoff and records per-endpoint latency.
+    """
+
+    def __init__(self, base_url, connect_timeout=SERVICE_CONNECT_TIMEOUT, read_timeout=SERVICE_READ_TIMEOUT,
+                 retries=SERVICE_RETRIES, backoff_factor=SERVICE_RETRY_BACKOFF, pool_size=SERVICE_POOL_SIZE):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = f"{method.upper()} {ID_SEGMENT.sub('/<id>', path.split('?')[0])}"
+        started_at = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.observe(endpoint, (time.perf_counter() - started_at) * 1000, failed)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def observe(self, endpoint, elapsed_ms, failed):
+        with self.lock:
+            histogram = self.histograms.get(endpoint)
+            if histogram is None:
+                histogram = self.histograms[endpoint] = LatencyHistogram()
+            histogram.observe(elapsed_ms, failed)
+
+    def latency_histograms(self):
+        with self.lock:
+            return {endpoint: histogram.snapshot() for endpoint, histogram in self.histograms.items()}
+
+
+# one client, and so one connection pool, per downstream base URL in this process
+clients = {}
+clients_lock = threading.Lock()
+
+def get_client(base_url):
+    with clients_lock:
+        client = clients.get(base_url)
+        if client is None:
+            client = clients[base_url] = ServiceClient(base_url)
+        return client
+
+fan_out_executor = ThreadPoolExecutor(max_workers=SERVICE_FANOUT_WORKERS, thread_name_prefix="service-fan-out")
+
+# Run independent downstream calls concurrently and return their results in order.
+# Exceptions are re-raised in the caller. The calls must not fan out themselves, the pool is bounded.
+def fan_out(calls):
+    calls = list(calls)
+    if len(calls) <= 1:
+        return [call() for call in calls]
+    futures = [fan_out_executor.submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+# Register an endpoint exposing the latency histograms of every client in this process
+def init_app(app):
+    def service_client_metrics():
+        with clients_lock:
+            metrics = {base_url: client.latency_histograms() for base_url, client in clients.items()}
+        return jsonify({"message": "Service client metrics", "data": metrics, "code": 200}), 200
+
+    app.add_url_rule('/service_client/metrics', 'service_client_metrics', service_client_metrics, methods=['GET'])
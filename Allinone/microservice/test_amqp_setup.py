@@ -0,0 +1,139 @@
+from unittest import mock
+import pika
+import pytest
+from pika.exceptions import StreamLostError
+from . import amqp_setup
+from .amqp_setup import retry_or_dead_letter, declare_retry_queues, Publisher, PublishError, PUBLISH_ATTEMPTS
+
+def fake_connection():
+    connection = mock.Mock()
+    connection.is_closed = False
+    connection.is_open = True
+    connection.channel.return_value.is_closed = False
+    return connection
+
+def published_to(channel):
+    return channel.basic_publish.call_args.kwargs
+
+def test_declare_retry_queues():
+    channel = mock.Mock()
+    declare_retry_queues(channel, "work", [1000, 5000])
+
+    declared = {call.kwargs["queue"]: call.kwargs.get("arguments") for call in channel.queue_declare.call_args_list}
+    assert declared["work.retry.1000"] == {
+        "x-message-ttl": 1000, "x-dead-letter-exchange": "", "x-dead-letter-routing-key": "work"
+    }
+    assert "work.retry.5000" in declared
+    assert "work.dlq" in declared
+
+def retry_publisher():
+    return Publisher(connect=mock.Mock(side_effect=fake_connection))
+
+def test_retries_with_backoff_then_dead_letters():
+    publisher = retry_publisher()
+    properties = pika.BasicProperties(headers=None)
+
+    assert retry_or_dead_letter(publisher, "work", b"{}", properties, [1000, 5000]) == "work.retry.1000"
+    properties = published_to(publisher.channel)["properties"]
+    assert properties.headers["x-retry-count"] == 1
+
+    assert retry_or_dead_letter(publisher, "work", b"{}", properties, [1000, 5000]) == "work.retry.5000"
+    properties = published_to(publisher.channel)["properties"]
+
+    assert retry_or_dead_letter(publisher, "work", b"{}", properties, [1000, 5000], ValueError("bad")) == "work.dlq"
+    assert published_to(publisher.channel)["properties"].headers["x-last-error"] == "bad"
+
+def test_retry_count_header_picks_the_delay():
+    publisher = retry_publisher()
+
+    target = retry_or_dead_letter(publisher, "work", b"{}", pika.BasicProperties(headers={"x-retry-count": 1, "trace": "abc"}),
+                                  [1000, 5000, 30000])
+    assert target == "work.retry.5000"
+    assert published_to(publisher.channel)["properties"].headers == {"x-retry-count": 2, "trace": "abc"}
+
+    target = retry_or_dead_letter(publisher, "work", b"{}", pika.BasicProperties(headers={"x-retry-count": 3}), [1000, 5000, 30000])
+    assert target == "work.dlq"
+    assert published_to(publisher.channel)["properties"].headers["x-retry-count"] == 4
+
+def test_retry_keeps_the_message_properties_and_commits_the_copy():
+    publisher = retry_publisher()
+    properties = pika.BasicProperties(message_id="task-1", content_type="application/json", delivery_mode=2,
+                                      headers={"trace": "abc"})
+
+    retry_or_dead_letter(publisher, "work", b"{}", properties, [1000])
+
+    published = published_to(publisher.channel)["properties"]
+    assert (published.message_id, published.content_type, published.delivery_mode) == ("task-1", "application/json", 2)
+    assert published.headers == {"trace": "abc", "x-retry-count": 1}
+    assert properties.headers == {"trace": "abc"}
+    publisher.channel.tx_commit.assert_called_once()
+    # the retry queues are declared with their TTL by the consumer, declaring them again would not match
+    publisher.channel.queue_declare.assert_not_called()
+
+def test_publisher_reuses_connection():
+    connect = mock.Mock(side_effect=fake_connection)
+    publisher = Publisher(connect=connect)
+
+    publisher.publish({"id": 1}, queue="work")
+    publisher.publish_batch([{"id": 2}, {"id": 3}], queue="work")
+
+    assert connect.call_count == 1
+    channel = publisher.channel
+    channel.tx_select.assert_called_once()
+    channel.queue_declare.assert_called_once_with(queue="work", durable=True)
+    assert channel.basic_publish.call_count == 3
+    assert channel.tx_commit.call_count == 2
+
+def test_publisher_commits_once_per_chunk():
+    publisher = Publisher(connect=mock.Mock(side_effect=fake_connection))
+
+    with mock.patch.object(amqp_setup, "PUBLISH_CHUNK_SIZE", 2):
+        assert publisher.publish_batch([{"id": 1}, {"id": 2}, {"id": 3}], queue="work") == 3
+
+    calls = [name for name, _, _ in publisher.channel.method_calls if name in ("basic_publish", "tx_commit")]
+    assert calls == ["basic_publish", "basic_publish", "tx_commit", "basic_publish", "tx_commit"]
+
+def test_publisher_reconnects_without_duplicates():
+    connections = [fake_connection(), fake_connection()]
+    first_channel = connections[0].channel.return_value
+    first_channel.basic_publish.side_effect = [None, StreamLostError("lost")]
+    publisher = Publisher(connect=mock.Mock(side_effect=connections))
+
+    with mock.patch.object(amqp_setup, "PUBLISH_CHUNK_SIZE", 1):
+        assert publisher.publish_batch([{"id": 1}, {"id": 2}, {"id": 3}], queue="work") == 3
+
+    second_channel = connections[1].channel.return_value
+    assert [call.kwargs["body"] for call in second_channel.basic_publish.call_args_list] == ['{"id": 2}', '{"id": 3}']
+
+def test_publisher_republishes_an_uncommitted_chunk():
+    connections = [fake_connection(), fake_connection()]
+    connections[0].channel.return_value.basic_publish.side_effect = [None, StreamLostError("lost")]
+    publisher = Publisher(connect=mock.Mock(side_effect=connections))
+
+    assert publisher.publish_batch([{"id": 1}, {"id": 2}, {"id": 3}], queue="work") == 3
+
+    second_channel = connections[1].channel.return_value
+    assert [call.kwargs["body"] for call in second_channel.basic_publish.call_args_list] == \
+        ['{"id": 1}', '{"id": 2}', '{"id": 3}']
+
+def test_publisher_reports_committed_count_when_giving_up():
+    connections = [fake_connection() for _ in range(PUBLISH_ATTEMPTS)]
+    connections[0].channel.return_value.basic_publish.side_effect = [None, StreamLostError("lost")]
+    for connection in connections[1:]:
+        connection.channel.return_value.basic_publish.side_effect = StreamLostError("lost")
+    publisher = Publisher(connect=mock.Mock(side_effect=connections))
+
+    with pytest.raises(PublishError) as error, mock.patch.object(amqp_setup, "PUBLISH_CHUNK_SIZE", 1):
+        publisher.publish_batch([{"id": 1}, {"id": 2}, {"id": 3}], queue="work")
+    assert error.value.published == 1
+
+def test_publisher_reports_committed_count_on_socket_error():
+    connection = fake_connection()
+    connection.channel.return_value.basic_publish.side_effect = [None, None, ConnectionResetError("reset")]
+    connect = mock.Mock(return_value=connection)
+    publisher = Publisher(connect=connect)
+
+    with pytest.raises(PublishError) as error, mock.patch.object(amqp_setup, "PUBLISH_CHUNK_SIZE", 1):
+        publisher.publish_batch([{"id": 1}, {"id": 2}, {"id": 3}], queue="work")
+    assert error.value.published == 2
+    assert connect.call_count == 1
@@ -0,0 +1,132 @@
+import pytest
+from unittest import mock
+import requests
+from flask import Flask
+from . import employee_directory
+from .employee_directory import EmployeeDirectory
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def fake_response(status_code, data=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.json.return_value = {"data": data}
+    return response
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def client():
+    return mock.Mock()
+
+@pytest.fixture
+def directory(clock, client):
+    return EmployeeDirectory(ttl=60, negative_ttl=5, maxsize=2, clock=clock, client=client)
+
+def test_get_user_is_cached(directory, client):
+    client.get.return_value = fake_response(200, {"staff_id": 1, "email": "a@allinone.com"})
+    assert directory.get_user(1) == {"staff_id": 1, "email": "a@allinone.com"}
+    assert directory.get_user("1") == {"staff_id": 1, "email": "a@allinone.com"}
+    assert directory.get_manager_email(1) == "a@allinone.com"
+
+    client.get.assert_called_once_with("/user/1")
+    stats = directory.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_get_user_expires_after_ttl(directory, client, clock):
+    client.get.return_value = fake_response(200, {"staff_id": 1})
+    directory.get_user(1)
+    clock.now = 61
+    directory.get_user(1)
+
+    assert client.get.call_count == 2
+
+def test_not_found_is_negatively_cached(directory, client, clock):
+    client.get.return_value = fake_response(404)
+    assert directory.get_user(999) is None
+    assert directory.get_user(999) is None
+    clock.now = 6
+    assert directory.get_user(999) is None
+
+    assert client.get.call_count == 2
+    assert directory.stats()["negative_hits"] == 1
+
+def test_errors_are_not_cached(directory, client):
+    client.get.side_effect = requests.exceptions.ConnectionError("down")
+    assert directory.get_user(1) is None
+    assert directory.get_user(1) is None
+
+    assert client.get.call_count == 2
+    assert directory.stats()["errors"] == 2
+
+def test_least_recently_used_entry_is_evicted(directory, client):
+    client.get.side_effect = lambda path: fake_response(200, {"path": path})
+    directory.get_user(1)
+    directory.get_user(2)
+    directory.get_user(1)
+    directory.get_user(3)  # evicts 2
+    directory.get_user(1)
+    directory.get_user(2)
+
+    assert client.get.call_count == 4
+
+def test_invalidate(directory, client):
+    client.get.return_value = fake_response(200, {"staff_id": 1})
+    directory.get_user(1)
+    directory.invalidate(1)
+    directory.get_user(1)
+    directory.invalidate()
+    directory.get_user(1)
+
+    assert client.get.call_count == 3
+
+def test_invalidation_route(directory, client):
+    app = Flask(__name__)
+    directory.init_app(app)
+    test_client = app.test_client()
+
+    client.get.return_value = fake_response(200, {"staff_id": 1})
+    directory.get_user(1)
+    response = test_client.post('/employee_cache/invalidate', json={"staff_id": 1})
+    directory.get_user(1)
+
+    assert response.status_code == 200
+    assert client.get.call_count == 2
+    assert test_client.get('/employee_cache/stats').json['data']['misses'] == 2
+
+def test_get_users_batches_cache_misses(directory, client):
+    client.get.return_value = fake_response(200, {"staff_id": 1})
+    directory.get_user(1)
+
+    client.post.return_value = fake_response(200, {"2": {"staff_id": 2}})
+    assert directory.get_users([1, 2, 3, 2]) == {"1": {"staff_id": 1}, "2": {"staff_id": 2}, "3": None}
+    assert directory.get_users([2, 3]) == {"2": {"staff_id": 2}, "3": None}
+
+    client.post.assert_called_once_with("/users/batch", json={"staff_ids": ["2", "3"]})
+
+def test_get_users_splits_large_batches(directory, client):
+    client.post.side_effect = lambda path, json: fake_response(200, {key: {"staff_id": key} for key in json["staff_ids"]})
+    with mock.patch.object(employee_directory, 'EMPLOYEE_BATCH_SIZE', 1):
+        employees = directory.get_users([1, 2])
+
+    assert employees == {"1": {"staff_id": "1"}, "2": {"staff_id": "2"}}
+    assert client.post.call_count == 2
+
+def test_get_users_leaves_out_failed_lookups(directory, client):
+    client.post.side_effect = requests.exceptions.ConnectionError("down")
+    assert directory.get_users([1, 2]) == {}
+
+    client.post.side_effect = None
+    client.post.return_value = fake_response(500)
+    assert directory.get_users([1, 2]) == {}
+
+    assert directory.stats()["errors"] == 4
+    assert len(directory.cache) == 0
@@ -0,0 +1,66 @@
+import os
+from datetime import date
+from unittest import mock
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, select, text
+from .requests_log.requests_log import Request, RequestDates
+from .employee.employee import Employee
+from .blockout.blockout import BlockoutDates
+from .arrangement.arrangement import Arrangement
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+# the tables spm_db.sql created before the first migration, without any of the indexes the migrations add
+BASE_TABLES = (Employee, Request, RequestDates, BlockoutDates, Arrangement)
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('migrations') / 'spm_db.sqlite'}"
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        for model in BASE_TABLES:
+            model.__table__.create(connection)
+            for index in model.__table__.indexes:
+                index.drop(connection)
+
+    # no alembic.ini, so env.py leaves the test run's logging configuration alone
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS)
+    with mock.patch.dict(os.environ, {"dbURL": url}):
+        command.upgrade(config, 'head')
+    return engine
+
+def test_migrations_create_the_model_indexes(engine):
+    inspector = inspect(engine)
+    for table in Request.metadata.sorted_tables:
+        migrated = {index['name']: [column.lower() for column in index['column_names']]
+                    for index in inspector.get_indexes(table.name)}
+        declared = {index.name: [column.name.lower() for column in index.columns] for index in table.indexes}
+        assert migrated == declared, table.name
+
+def query_plan(engine, statement):
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return " ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+@pytest.mark.parametrize("statement, index", [
+    (select(Request).where(Request.manager_id == 140001, Request.status == 'Pending'),
+     'ix_request_log_manager_status'),
+    # auto_reject_pending_requests
+    (select(Request).where(Request.status == 'Pending', Request.request_date <= date(2024, 8, 1)),
+     'ix_request_log_status_request_date'),
+    (select(RequestDates).where(RequestDates.request_id.in_([1, 2, 3])),
+     'ix_requestdates_request_id'),
+    (select(Employee).where(Employee.reporting_manager == 140001),
+     'ix_employee_reporting_manager'),
+    (select(Employee).where(Employee.email == 'susan@allinone.com'),
+     'ix_employee_email'),
+    (select(BlockoutDates).where(BlockoutDates.start_date <= date(2024, 10, 8), BlockoutDates.end_date >= date(2024, 10, 8)),
+     'ix_block_out_dates_start_end'),
+    # heatmap and team schedule ranges
+    (select(Arrangement).where(Arrangement.arrangement_date.between(date(2024, 10, 1), date(2024, 10, 31))),
+     'ix_arrangement_date'),
+])
+def test_hot_queries_use_index(engine, statement, index):
+    assert index in query_plan(engine, statement)
@@ -0,0 +1,76 @@
+import threading
+import pytest
+from unittest import mock
+from flask import Flask
+from . import service_client
+from .service_client import ServiceClient, LatencyHistogram
+
+def fake_response(status_code):
+    response = mock.Mock()
+    response.status_code = status_code
+    return response
+
+def test_histogram_buckets():
+    histogram = LatencyHistogram(buckets=(10, 100))
+    histogram.observe(5)
+    histogram.observe(50)
+    histogram.observe(500, failed=True)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 3
+    assert snapshot["errors"] == 1
+    assert snapshot["buckets"] == {"le_10ms": 1, "le_100ms": 1, "inf": 1}
+
+def test_request_applies_timeout_and_folds_ids():
+    client = ServiceClient("http://employee/", connect_timeout=1, read_timeout=2)
+    with mock.patch.object(client.session, 'request', return_value=fake_response(200)) as request:
+        client.get("/user/140001")
+        client.get("/user/140002?fields=email")
+        client.post("/users/batch", json={"staff_ids": [1]})
+
+    request.assert_any_call("GET", "http://employee/user/140001", timeout=(1, 2))
+    histograms = client.latency_histograms()
+    assert histograms["GET /user/<id>"]["count"] == 2
+    assert histograms["POST /users/batch"]["count"] == 1
+
+def test_server_errors_are_counted():
+    client = ServiceClient("http://employee")
+    with mock.patch.object(client.session, 'request', return_value=fake_response(503)):
+        client.get("/users")
+
+    assert client.latency_histograms()["GET /users"]["errors"] == 1
+
+def test_retries_only_idempotent_methods():
+    client = ServiceClient("http://employee", retries=3)
+    retry = client.session.get_adapter("http://employee").max_retries
+    assert retry.total == 3
+    assert "GET" in retry.allowed_methods
+    assert "POST" not in retry.allowed_methods
+
+def test_get_client_reuses_pool():
+    assert service_client.get_client("http://example") is service_client.get_client("http://example")
+
+def test_metrics_route():
+    app = Flask(__name__)
+    service_client.init_app(app)
+    service_client.get_client("http://example").observe("GET /ping", 1.0, False)
+
+    response = app.test_client().get('/service_client/metrics')
+    assert response.status_code == 200
+    assert response.json['data']['http://example']['GET /ping']['count'] == 1
+
+def test_fan_out_runs_calls_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call(value):
+        barrier.wait()  # only passes once all three calls are running at the same time
+        return value
+
+    assert service_client.fan_out(lambda value=value: call(value) for value in range(3)) == [0, 1, 2]
+
+def test_fan_out_reraises_errors():
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        service_client.fan_out([lambda: 1, fail])
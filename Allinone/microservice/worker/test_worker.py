@@ -0,0 +1,121 @@
+import os
+import sys
+import pytest
+import pika
+from unittest import mock
+from pika.exceptions import StreamLostError
+
+# worker.py imports arrangement.py flat, as they sit side by side in the worker image
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'arrangement'))
+
+from ..amqp_setup import PublishError
+from ..worker import worker
+from ..worker.worker import app, db, Revoke_Task_Step, run_revoke_task, process_revoke_task, \
+    get_completed_steps, run_consumer, REVOKE_RETRY_DELAYS_MS
+
+@pytest.fixture
+def services():
+    """In-memory database for the task steps, with the arrangement, request log and notification calls stubbed"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    with app.app_context():
+        db.create_all()
+        with mock.patch.object(worker, "withdraw_arrangements_bulk") as withdraw, \
+                mock.patch.object(worker, "request_log_service") as request_log_service, \
+                mock.patch.object(worker, "notification_service") as notification_service:
+            request_log_service.put.return_value = mock.Mock(status_code=200)
+            notification_service.post.return_value = mock.Mock(status_code=202)
+            yield mock.Mock(withdraw=withdraw, update=request_log_service.put, notify=notification_service.post)
+        db.session.remove()
+        db.drop_all()
+
+TASK = {
+    "task_id": "task-1",
+    "staff_id": 140002,
+    "revoke_dates": ["2024-10-08"],
+    "staff_email": "susan@allinone.com",
+    "manager_email": "derek@allinone.com",
+    "arrangements_to_delete": [[1, 1], [1, 2]]
+}
+
+def delivery(body, headers=None):
+    """The arguments RabbitMQ passes to process_revoke_task"""
+    return mock.Mock(), mock.Mock(delivery_tag=7), pika.BasicProperties(headers=headers), body
+
+@pytest.fixture
+def publisher():
+    """The shared publisher that moves failed tasks to the retry and dead-letter queues"""
+    with mock.patch.object(worker, "publisher") as publisher:
+        yield publisher
+
+def moved_to(publisher):
+    bodies, queue, properties = publisher.publish_bodies.call_args.args
+    return queue, properties
+
+def test_run_revoke_task_skips_completed_steps(services):
+    with app.app_context():
+        db.session.add_all([Revoke_Task_Step(task_id="task-1", step="withdraw_arrangements"),
+                            Revoke_Task_Step(task_id="task-1", step="update_requests")])
+        db.session.commit()
+
+    run_revoke_task(TASK, "task-1")
+
+    services.withdraw.assert_not_called()
+    services.update.assert_not_called()
+    services.notify.assert_called_once()
+    assert get_completed_steps("task-1") == {"withdraw_arrangements", "update_requests", "notify"}
+
+def test_redelivered_task_resumes_after_the_failed_step(services):
+    services.notify.return_value = mock.Mock(status_code=500)
+    with pytest.raises(Exception):
+        run_revoke_task(TASK, "task-1")
+
+    services.notify.return_value = mock.Mock(status_code=202)
+    run_revoke_task(TASK, "task-1")
+
+    services.withdraw.assert_called_once_with([[1, 1], [1, 2]])
+    services.update.assert_called_once()
+    assert services.notify.call_count == 2
+
+def test_task_missing_fields_goes_to_the_dead_letter_queue(services, publisher):
+    channel, method, properties, body = delivery(b'{"task_id": "task-2"}')
+
+    process_revoke_task(channel, method, properties, body)
+
+    assert moved_to(publisher)[0] == "revoke_queue.dlq"
+    channel.basic_ack.assert_called_once_with(delivery_tag=7)
+    services.withdraw.assert_not_called()
+
+def test_failed_task_goes_to_the_next_retry_queue(services, publisher):
+    services.update.return_value = mock.Mock(status_code=500)
+    channel, method, properties, body = delivery(b'{"task_id": "task-1", "staff_id": 140002, "revoke_dates": [], '
+                                                 b'"staff_email": "", "manager_email": "", "arrangements_to_delete": []}',
+                                                 headers={"x-retry-count": 1})
+
+    process_revoke_task(channel, method, properties, body)
+
+    queue, published_properties = moved_to(publisher)
+    assert queue == f"revoke_queue.retry.{REVOKE_RETRY_DELAYS_MS[1]}"
+    assert published_properties.headers["x-retry-count"] == 2
+    channel.basic_ack.assert_called_once_with(delivery_tag=7)
+
+def test_task_is_requeued_when_it_cannot_be_moved_to_a_retry_queue(services, publisher):
+    channel, method, properties, body = delivery(b'not json')
+    publisher.publish_bodies.side_effect = PublishError(0, StreamLostError("lost"))
+
+    process_revoke_task(channel, method, properties, body)
+
+    channel.basic_nack.assert_called_once_with(delivery_tag=7, requeue=True)
+    channel.basic_ack.assert_not_called()
+
+def test_consumer_reconnects_when_its_connection_drops():
+    dropped, connection = mock.Mock(), mock.Mock()
+    dropped.channel.return_value.start_consuming.side_effect = StreamLostError("lost")
+    with mock.patch.object(worker, "connect", side_effect=[dropped, connection]) as connect, \
+            mock.patch.object(worker.time, "sleep"):
+        run_consumer(0)
+
+    assert connect.call_count == 2
+    connection.channel.return_value.start_consuming.assert_called_once()
@@ -1,8 +1,12 @@
 import pika
+from pika.exceptions import AMQPError
 import json
-import requests
-from datetime import datetime
-from arrangement import Arrangement, withdraw_arrangement, app, db
+import hashlib
+import threading
+from sqlalchemy.exc import IntegrityError
+from arrangement import withdraw_arrangements_bulk, app
+from models import db, Revoke_Task_Step
+from amqp_setup import declare_retry_queues, retry_or_dead_letter, publisher, REVOKE_QUEUE
 from dotenv import load_dotenv
 import os
 import time
@@ -11,125 +15,164 @@ load_dotenv()
 
 # URL endpoints for the existing microservices
 NOTIFICATION_MICROSERVICE_URL = os.getenv("NOTIFICATION_MICROSERVICE_URL")
-MANAGE_REQUEST_MICROSERVICE_URL = os.getenv("MANAGE_REQUEST_MICROSERVICE_URL")
+REQUEST_LOG_MICROSERVICE_URL = os.getenv("REQUEST_LOG_MICROSERVICE_URL")
 
-print(MANAGE_REQUEST_MICROSERVICE_URL)
+print(REQUEST_LOG_MICROSERVICE_URL)
 print(NOTIFICATION_MICROSERVICE_URL)
 
+import service_client
 
-# try at least 5 times
-retry_count = 0
-while retry_count < 5:
-    try:
-        # Connect to RabbitMQ
-        connection = pika.BlockingConnection(pika.ConnectionParameters(os.getenv('RABBITMQ_HOST')))
-        break
-    except pika.exceptions.AMQPConnectionError:
-        print("RabbitMQ is not available. Retrying...")
-        retry_count += 1
-        time.sleep(5)
-
-if retry_count == 5:
-    raise Exception("Failed to connect to RabbitMQ after multiple attempts.")
+# pooled clients for the downstream microservices
+request_log_service = service_client.get_client(REQUEST_LOG_MICROSERVICE_URL)
+notification_service = service_client.get_client(NOTIFICATION_MICROSERVICE_URL)
 
+# consumer threads, each with its own connection and channel
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 4))
+# unacked messages RabbitMQ hands to each consumer
+WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", 1))
+# delay before each retry in milliseconds, the task is dead-lettered once they run out
+REVOKE_RETRY_DELAYS_MS = [int(delay) for delay in os.getenv("REVOKE_RETRY_DELAYS_MS", "5000,30000,300000").split(",")]
 
-channel = connection.channel()
 
-# Declare the queue
-channel.queue_declare(queue='revoke_queue', durable=True)
+class PermanentTaskError(Exception):
+    """A task that will fail the same way on every attempt, it goes straight to the dead-letter queue."""
 
-def process_revoke_task(ch, method, properties, body):
-    data = json.loads(body)
-    staff_id = data['staff_id']
-    # revoke_dates = [datetime.strptime(date, '%Y-%m-%d').date() for date in data['revoke_dates']]
-    revoke_dates = data['revoke_dates']
-    staff_email = data['staff_email']
-    manager_email = data['manager_email']
-    arrangements_to_delete = data['arrangements_to_delete']
 
+# Tasks published before task ids existed fall back to a hash of their body
+def get_task_id(data, body):
+    return data.get('task_id') or hashlib.sha256(body).hexdigest()
+
+def get_completed_steps(task_id):
     with app.app_context():
-        # 2. Delete arrangements
-        # arrangements_to_delete = Arrangement.query.filter(
-        #     Arrangement.staff_id==staff_id,
-        #     Arrangement.arrangement_date.in_(revoke_dates)
-        # ).all()
-        # request_ids = [arrangement[0] for arrangement in arrangements_to_delete]
-        # delete_response, delete_status_code = delete_arrangements(request_ids)
-        # if delete_status_code != 200:
-        #     print(f"Failed to delete arrangements for staff_id {staff_id}")
-        #     return delete_response
-
-        for (request_id, arrangement_id) in arrangements_to_delete: 
-            # Delete arrangements in the database
-            print(f"Arrangement <{request_id}, {arrangement_id}>")
-            print("   Deleting arrangement...")
-            delete_response, delete_status_code = withdraw_arrangement(request_id, arrangement_id)
-            if delete_status_code != 200:
-                print(f"Failed to delete arrangements for staff_id {staff_id}")
-                return delete_response
-            
-            update_request_data = {
-                "request_id": request_id,
-                "status": "Withdrawn",
-                "disable_notification": True
-            }
-
-            print("   Updating request status...")
-            update_request_response = requests.put(f"{MANAGE_REQUEST_MICROSERVICE_URL}/manage_request", json=update_request_data)
-            print(update_request_response.json())
-            if update_request_response.status_code != 200:
-                print(f"Failed to update request status for Request ID {request_id}")
-                return update_request_response
-        
-        print("All arrangements successfully deleted, with request statuses updated")
-        # # 3. Update statuses
-        # print("Updating request statuses...")
-        # for request_id in :
-        #     print(f"Updating status for Request ID {request_id}")
-        #     update_request_data = {
-        #         "request_id": request_id,
-        #         "status": "Withdrawn",
-        #         "disable_notification": True
-        #     }
-            
-        #     update_request_response = requests.put(f"{os.getenv('MANAGE_REQUEST_URL')}/manage_request", json=update_request_data)
-        #     print(update_request_response.json())
-        #     if update_request_response.status_code != 200:
-        #         print(f"Failed to update request status for Request ID {request_id}")
-        #         return update_request_response
-            
-        # print("All request statuses successfully updated.")
-
-        # Send notification email
-        print("Preparing to send emails...")
-
-        revoke_notification_data = { 
+        return {task_step.step for task_step in Revoke_Task_Step.query.filter_by(task_id=task_id)}
+
+def mark_step_completed(task_id, step):
+    with app.app_context():
+        try:
+            db.session.add(Revoke_Task_Step(task_id=task_id, step=step))
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent redelivery already recorded it
+            db.session.rollback()
+
+
+def connect():
+    # try at least 5 times
+    retry_count = 0
+    while retry_count < 5:
+        try:
+            # Connect to RabbitMQ
+            return pika.BlockingConnection(pika.ConnectionParameters(os.getenv('RABBITMQ_HOST')))
+        except pika.exceptions.AMQPConnectionError:
+            print("RabbitMQ is not available. Retrying...")
+            retry_count += 1
+            time.sleep(5)
+
+    raise Exception("Failed to connect to RabbitMQ after multiple attempts.")
+
+# Withdraw the arrangements, update request statuses and notify, skipping steps a previous delivery completed.
+# Raises on the first failing step.
+def run_revoke_task(data, task_id):
+    try:
+        staff_id = data['staff_id']
+        revoke_dates = data['revoke_dates']
+        staff_email = data['staff_email']
+        manager_email = data['manager_email']
+        arrangements_to_delete = data['arrangements_to_delete']
+    except KeyError as e:
+        raise PermanentTaskError(f"Revoke task is missing {e}")
+
+    completed_steps = get_completed_steps(task_id)
+
+    # 1. Delete every arrangement of the task in one statement
+    if 'withdraw_arrangements' not in completed_steps:
+        print(f"Deleting {len(arrangements_to_delete)} arrangements for staff_id {staff_id}...")
+        with app.app_context():
+            withdraw_arrangements_bulk(arrangements_to_delete)
+        mark_step_completed(task_id, 'withdraw_arrangements')
+
+    # 2. Mark the affected requests as withdrawn in one call
+    if 'update_requests' not in completed_steps:
+        request_ids = list(dict.fromkeys(request_id for request_id, _ in arrangements_to_delete))
+        print("Updating request statuses...")
+        update_request_response = request_log_service.put(
+            "/update_requests/bulk",
+            json={"request_ids": request_ids, "status": "Withdrawn"}
+        )
+        if update_request_response.status_code != 200:
+            raise Exception(f"Failed to update request status for Request IDs {request_ids}")
+        mark_step_completed(task_id, 'update_requests')
+
+    print("All arrangements successfully deleted, with request statuses updated")
+
+    # 3. Send notification email
+    if 'notify' not in completed_steps:
+        revoke_notification_data = {
             "staff_email": staff_email,
             "manager_email": manager_email,
             "revoke_dates": revoke_dates,
             "arrangements_to_delete": arrangements_to_delete
         }
-        
-        print("Sending emails...")
-        notification_response = requests.post(f"{NOTIFICATION_MICROSERVICE_URL}/notify_revoke_arrangements", json=revoke_notification_data)
-        print(notification_response.json())
 
-        if notification_response.status_code != 200:
-            print(f"Failed to send email.")
-            return notification_response
+        print("Sending emails...")
+        notification_response = notification_service.post("/notify_revoke_arrangements", json=revoke_notification_data)
+        if notification_response.status_code not in (200, 202):
+            raise Exception(f"Failed to send email, notification service returned {notification_response.status_code}")
+        mark_step_completed(task_id, 'notify')
 
     print(f"Completed processing revocation task for staff_id {staff_id}")
-    ch.basic_ack(delivery_tag=method.delivery_tag)
-    
-    print()
-    print('Worker is waiting for messages...')
 
-def consume_message(ch, method, properties, body):
-    ch.basic_ack(delivery_tag=method.delivery_tag)
+# Every delivery is acked: failed tasks are first moved to a retry queue or the dead-letter queue,
+# so a failing task can never sit unacked and hold up the consumer. The move is committed through the shared
+# publisher before the ack, the consumer channel stays free of transactions.
+# If the move itself fails the delivery is handed back to the broker instead of being acked and lost.
+def process_revoke_task(ch, method, properties, body):
+    try:
+        data = json.loads(body)
+        run_revoke_task(data, get_task_id(data, body))
+    except Exception as e:
+        permanent = isinstance(e, (PermanentTaskError, ValueError))
+        try:
+            target = retry_or_dead_letter(publisher, REVOKE_QUEUE, body, properties, [] if permanent else REVOKE_RETRY_DELAYS_MS, e)
+        except (AMQPError, OSError) as publish_error:
+            print(f"Revoke task failed and could not be moved to a retry queue, requeueing it: {publish_error}")
+            # raises as well when the channel is closed, run_consumer then reconnects and the broker redelivers
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            return
+        print(f"Revoke task failed, moved to {target}: {e}")
 
-# Set up consumer
-channel.basic_consume(queue='revoke_queue', on_message_callback=process_revoke_task)
-# channel.basic_consume(queue='revoke_queue', on_message_callback=consume_message)
+    ch.basic_ack(delivery_tag=method.delivery_tag)
 
-print('Worker is waiting for messages...')
-channel.start_consuming()
+# Consume revoke_queue on a dedicated connection, pika connections must not be shared between threads.
+# Reconnects whenever the connection or channel is lost, unacked deliveries are redelivered by the broker.
+def run_consumer(consumer_id):
+    while True:
+        try:
+            connection = connect()
+            channel = connection.channel()
+
+            # Declare the queue with its retry and dead-letter queues
+            declare_retry_queues(channel, REVOKE_QUEUE, REVOKE_RETRY_DELAYS_MS)
+            channel.basic_qos(prefetch_count=WORKER_PREFETCH)
+            channel.basic_consume(queue=REVOKE_QUEUE, on_message_callback=process_revoke_task)
+
+            print(f'Worker {consumer_id} is waiting for messages...')
+            channel.start_consuming()
+            return
+        except AMQPError as e:
+            print(f"Worker {consumer_id} lost its connection to RabbitMQ, reconnecting: {e}")
+            time.sleep(5)
+
+def main():
+    consumers = [
+        threading.Thread(target=run_consumer, args=(consumer_id,), name=f"revoke-consumer-{consumer_id}")
+        for consumer_id in range(WORKER_CONCURRENCY)
+    ]
+    for consumer in consumers:
+        consumer.start()
+    for consumer in consumers:
+        consumer.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,21 @@ CREATE TABLE Employee (
     Position VARCHAR(50) NOT NULL,
     Country VARCHAR(50) NOT NULL,
     Email VARCHAR(50) NOT NULL,
-    Reporting_Manager INT,
+    Reporting_Manager INT NOT NULL,
     
-    Role INT NOT NULL
-    -- FOREIGN KEY (Reporting_Manager) REFERENCES Employee(Staff_ID)
+    Role INT NOT NULL,
+    INDEX ix_employee_reporting_manager (Reporting_Manager),
+    INDEX ix_employee_email (Email)
+    -- the foreign key on Reporting_Manager is added after the employee values, which are not in reporting order
+);
+
+-- Employee_Hierarchy Table, closure of the reporting lines, filled by the employee service (flask rebuild-hierarchy)
+CREATE TABLE IF NOT EXISTS Employee_Hierarchy (
+    ancestor_id INT NOT NULL,
+    descendant_id INT NOT NULL,
+    depth INT NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id),
+    INDEX ix_employee_hierarchy_descendant_depth (descendant_id, depth)
 );
 
 -- User_Role
@@ -54,7 +65,11 @@ CREATE TABLE IF NOT EXISTS Request_Log (
     start_date DATE NULL,
     end_date DATE NULL,
     is_recurring BOOLEAN NOT NULL,
-    FOREIGN KEY (staff_id) REFERENCES Employee(staff_id)
+    every_n_weeks INT NOT NULL DEFAULT 1,
+    exclude_dates TEXT NULL, -- comma separated dates a recurring request skips
+    FOREIGN KEY (staff_id) REFERENCES Employee(staff_id),
+    INDEX ix_request_log_manager_status (manager_id, status),
+    INDEX ix_request_log_status_request_date (status, request_date)
 );
 
 -- Arrangement Table
@@ -67,7 +82,8 @@ CREATE TABLE IF NOT EXISTS Arrangement (
     reason VARCHAR(255) NOT NULL DEFAULT "",
     PRIMARY KEY (request_id, arrangement_id),
     FOREIGN KEY (staff_id) REFERENCES Employee(staff_id),
-    UNIQUE KEY unique_arrangement_constraint (staff_id, arrangement_date, timeslot)
+    UNIQUE KEY unique_arrangement_constraint (staff_id, arrangement_date, timeslot),
+    INDEX ix_arrangement_date (arrangement_date)
 );
 
 -- Block Out Dates Table
@@ -78,7 +94,8 @@ CREATE TABLE IF NOT EXISTS Block_Out_Dates (
     title VARCHAR(255) NOT NULL,
     blockout_description VARCHAR(255),
     timeslot VARCHAR(50) NOT NULL,
-    PRIMARY KEY (blockout_id)
+    PRIMARY KEY (blockout_id),
+    INDEX ix_block_out_dates_start_end (start_date, end_date)
 );
 
 -- Request_Dates Table for recurring dates
@@ -86,9 +103,35 @@ CREATE TABLE IF NOT EXISTS RequestDates (
     id INT AUTO_INCREMENT PRIMARY KEY,
     request_id INT NOT NULL,
     arrangement_date DATE NOT NULL,
+    INDEX ix_requestdates_request_id (request_id),
     FOREIGN KEY (request_id) REFERENCES Request_log(request_id)
 );
 
+-- Team_WFH_Occupancy Table, AM/PM WFH counts per manager's team per day, maintained by the arrangement service
+CREATE TABLE IF NOT EXISTS Team_WFH_Occupancy (
+    manager_id INT NOT NULL,
+    occupancy_date DATE NOT NULL,
+    am_count INT NOT NULL DEFAULT 0,
+    pm_count INT NOT NULL DEFAULT 0,
+    team_size INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (manager_id, occupancy_date)
+);
+
+-- Revoke_Task_Step Table, steps of a revoke task that already succeeded so redeliveries skip them
+CREATE TABLE IF NOT EXISTS Revoke_Task_Step (
+    task_id VARCHAR(64) NOT NULL,
+    step VARCHAR(32) NOT NULL,
+    completed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (task_id, step)
+);
+
+-- Job_State Table, high-water marks of the scheduled jobs so each run only scans rows it has not seen
+CREATE TABLE IF NOT EXISTS Job_State (
+    job_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    high_water_mark DATE NULL,
+    last_run_at DATETIME NULL
+);
+
 -- User_Role Values
 -- IMPT NEED TO IRON OUT
 INSERT INTO User_Role (Role, Role_Description) VALUES 
@@ -654,6 +697,8 @@ INSERT INTO Employee (Staff_ID, Staff_FName, Staff_LName, Dept, Position, Countr
     (210043, 'Phuc', 'Luon', 'IT', 'IT Team', 'Singapore', 'Phuc.Luon@allinone.com.sg', 210001, 2),
     (210044, 'Chandara', 'Tithe', 'IT', 'IT Team', 'Singapore', 'tithe.chandra@allinone.com.sg', 210001, 2);
 
+ALTER TABLE Employee ADD CONSTRAINT fk_employee_reporting_manager FOREIGN KEY (Reporting_Manager) REFERENCES Employee(Staff_ID);
+
 -- Credentials Value
 INSERT INTO Credentials (Staff_ID, Email, Password) VALUES
     (130002, 'jack.sim@allinone.com.sg', 'Password130002'),
@@ -697,6 +742,16 @@ INSERT INTO Arrangement (request_id, arrangement_id, staff_id, arrangement_date,
 (16, 1, 140004, '2024-10-21', "FULL", ''),
 (17, 1, 140002, '2024-11-01', "AM", '');
 
+-- Team_WFH_Occupancy values, counted from the seeded arrangements (same result as flask rebuild-occupancy)
+INSERT INTO Team_WFH_Occupancy (manager_id, occupancy_date, am_count, pm_count, team_size)
+SELECT e.Reporting_Manager, a.arrangement_date,
+    SUM(CASE WHEN a.timeslot IN ('AM', 'FULL') THEN 1 ELSE 0 END),
+    SUM(CASE WHEN a.timeslot IN ('PM', 'FULL') THEN 1 ELSE 0 END),
+    (SELECT COUNT(*) FROM Employee team WHERE team.Reporting_Manager = e.Reporting_Manager)
+FROM Arrangement a
+JOIN Employee e ON e.Staff_ID = a.staff_id
+GROUP BY e.Reporting_Manager, a.arrangement_date;
+
 -- RequestDates values
 INSERT INTO RequestDates (id, request_id, arrangement_date) VALUES
 (1, 1, '2024-10-01'),